@@ -0,0 +1,26 @@
+"""Add keyset pagination indexes
+
+Revision ID: 4b7c2d9e1a63
+Revises: e83283b48cdd
+Create Date: 2025-03-10 10:12:41.508112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7c2d9e1a63'
+down_revision: Union[str, None] = 'e83283b48cdd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_post_tag_tag_id_post_id', 'post_tag', ['tag_id', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_post_tag_tag_id_post_id', table_name='post_tag')
@@ -0,0 +1,39 @@
+"""Add post counts
+
+Revision ID: 5d2e8b7c3f41
+Revises: 7a5e0c4f9b12
+Create Date: 2025-03-17 09:42:18.214907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8b7c3f41'
+down_revision: Union[str, None] = '7a5e0c4f9b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tags', sa.Column('post_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('post_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        'UPDATE tags SET post_count = ('
+        'SELECT count(*) FROM post_tag JOIN posts ON posts.id = post_tag.post_id '
+        'WHERE post_tag.tag_id = tags.id AND NOT posts.is_deleted)'
+    )
+    op.execute(
+        'UPDATE users SET post_count = ('
+        'SELECT count(*) FROM posts WHERE posts.user_id = users.id AND NOT posts.is_deleted)'
+    )
+    op.create_index('ix_tags_post_count_id', 'tags', ['post_count', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tags_post_count_id', table_name='tags')
+    op.drop_column('users', 'post_count')
+    op.drop_column('tags', 'post_count')
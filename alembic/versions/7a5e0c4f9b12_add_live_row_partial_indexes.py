@@ -0,0 +1,34 @@
+"""Add live row partial indexes
+
+Revision ID: 7a5e0c4f9b12
+Revises: c3d81f0a27b5
+Create Date: 2025-03-14 11:26:57.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a5e0c4f9b12'
+down_revision: Union[str, None] = 'c3d81f0a27b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    live = dict(
+        sqlite_where=sa.text('is_deleted = 0'),
+        postgresql_where=sa.text('is_deleted = false'),
+    )
+    op.create_index('ix_posts_live_id', 'posts', ['id'], unique=False, **live)
+    op.create_index('ix_tags_live_id', 'tags', ['id'], unique=False, **live)
+    op.create_index('ix_users_live_username', 'users', ['username'], unique=False, **live)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_live_username', table_name='users')
+    op.drop_index('ix_tags_live_id', table_name='tags')
+    op.drop_index('ix_posts_live_id', table_name='posts')
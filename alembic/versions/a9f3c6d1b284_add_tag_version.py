@@ -0,0 +1,32 @@
+"""Add tag version
+
+Revision ID: a9f3c6d1b284
+Revises: 5d2e8b7c3f41
+Create Date: 2025-03-18 14:05:33.871260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f3c6d1b284'
+down_revision: Union[str, None] = '5d2e8b7c3f41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tag_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO tag_version (id, version) VALUES (1, 0)')
+
+
+def downgrade() -> None:
+    op.drop_table('tag_version')
@@ -0,0 +1,34 @@
+"""Make tag names unique among live tags
+
+Revision ID: b7d40e9c1f25
+Revises: e5b1f7a2c940
+Create Date: 2025-03-20 09:14:52.640183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d40e9c1f25'
+down_revision: Union[str, None] = 'e5b1f7a2c940'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_tags_name', table_name='tags')
+    op.create_index(
+        'ix_tags_live_name', 'tags', ['name'], unique=True,
+        sqlite_where=sa.text('is_deleted = 0'),
+        postgresql_where=sa.text('is_deleted = false'),
+    )
+
+
+def downgrade() -> None:
+    # Fails if a deleted tag and a live one share a name; purge the deleted
+    # rows first.
+    op.drop_index('ix_tags_live_name', table_name='tags')
+    op.create_index('ix_tags_name', 'tags', ['name'], unique=True)
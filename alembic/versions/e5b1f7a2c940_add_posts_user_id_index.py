@@ -0,0 +1,26 @@
+"""Add posts user_id index
+
+Revision ID: e5b1f7a2c940
+Revises: a9f3c6d1b284
+Create Date: 2025-03-19 10:42:17.306518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1f7a2c940'
+down_revision: Union[str, None] = 'a9f3c6d1b284'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_posts_user_id_id', 'posts', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_user_id_id', table_name='posts')
@@ -0,0 +1,183 @@
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from collections import defaultdict
+
+from app.auth import principal_cache
+from app.cache import TTLCache
+from app.env import (
+    ADMISSION_MAX_IN_FLIGHT, ADMISSION_AUTH_CONCURRENCY, ADMISSION_WRITE_CONCURRENCY, ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS, ADMISSION_RETRY_AFTER_SECONDS, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST,
+    RATE_LIMIT_CLIENTS
+)
+
+
+# Lower is admitted first when requests queue for the global limit.
+PRIORITIES = {"read": 0, "write": 1, "auth": 2}
+AUTH_PATHS = {"/login", "/signup"}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Never queued or shed: monitoring has to keep working under overload.
+EXEMPT_PATHS = {"/metrics"}
+
+
+class Shed(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+class Limiter:
+    def __init__(self, limit: int, queue_depth: int, timeout: float):
+        self.limit = limit
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters = []
+        self._order = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: int = 0):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.queue_depth:
+            raise Shed("queue_full")
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._order), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and not future.cancelled():
+                # The slot was handed over as we gave up; pass it on.
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise Shed("queue_timeout")
+            raise
+
+    def release(self):
+        # Hand the slot straight to the next waiter, keeping in_flight as is.
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class TokenBuckets:
+    def __init__(self, rate: float, burst: int, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        # A bucket idle long enough to refill completely is the same as a new
+        # one, so entries only need to live that long.
+        self.buckets = TTLCache(max_clients, burst / rate if rate > 0 else 0)
+
+    def take(self, client: str) -> float | None:
+        # None if the request may go ahead, else seconds until it could.
+        now = time.monotonic()
+        tokens, updated = self.buckets.peek(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.buckets.set(client, (tokens, now))
+            return (1 - tokens) / self.rate
+        self.buckets.set(client, (tokens - 1, now))
+        return None
+
+
+def request_class(scope) -> str:
+    if scope["path"] in AUTH_PATHS:
+        return "auth"
+    return "write" if scope["method"] in WRITE_METHODS else "read"
+
+
+def client_identity(scope) -> str:
+    # Only tokens get_current_user has already verified (and cached) count
+    # as a user; anything else is limited by address, so made-up tokens
+    # can't be used to dodge the limit.
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            user = principal_cache.peek(token) if scheme.lower() == "bearer" else None
+            if user is not None:
+                return f"user:{user.id}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class Admission:
+    def __init__(self):
+        self.global_limit = Limiter(ADMISSION_MAX_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+        # Reads are bounded by the global limit only; the expensive classes
+        # also get their own cap so they can't take all of it.
+        self.classes = {
+            "auth": Limiter(ADMISSION_AUTH_CONCURRENCY, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS),
+            "write": Limiter(ADMISSION_WRITE_CONCURRENCY, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS),
+        }
+        self.rate_limit = TokenBuckets(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_CLIENTS)
+        self.shed = defaultdict(int)
+
+    async def acquire(self, kind: str):
+        limiter = self.classes.get(kind)
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            await self.global_limit.acquire(PRIORITIES[kind])
+        except BaseException:
+            if limiter is not None:
+                limiter.release()
+            raise
+
+    def release(self, kind: str):
+        self.global_limit.release()
+        if kind in self.classes:
+            self.classes[kind].release()
+
+
+admission = Admission()
+
+
+async def reject(send, status: int, detail: str, retry_after: int):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"retry-after", str(retry_after).encode())],
+    })
+    await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        kind = request_class(scope)
+        if admission.rate_limit.rate > 0:
+            wait = admission.rate_limit.take(client_identity(scope))
+            if wait is not None:
+                admission.shed[kind, "rate_limited"] += 1
+                await reject(send, 429, "Too many requests", math.ceil(wait))
+                return
+        try:
+            await admission.acquire(kind)
+        except Shed as exc:
+            admission.shed[kind, exc.reason] += 1
+            await reject(send, 503, "Server busy, retry later", ADMISSION_RETRY_AFTER_SECONDS)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release(kind)
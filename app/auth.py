@@ -1,15 +1,19 @@
+import time
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 from typing import Annotated
 from jwt.exceptions import InvalidTokenError
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import TTLCache
 from app.database import get_session
-from app.env import SECRET_KEY, ALGORITHM
+from app.env import SECRET_KEY, ALGORITHM, PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+from app.metrics import record_auth
 import jwt
 from pydantic import BaseModel
 from app.models import User
-from sqlalchemy.sql import select
+from app.queries import USER_BY_USERNAME
 
 
 class TokenData(BaseModel):
@@ -18,12 +22,53 @@ class TokenData(BaseModel):
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Verified principals keyed by the raw bearer token, so a hit skips both the
+# JWT decode and the user lookup. Entries never outlive the token's exp.
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+# Writes to users go through Core UPDATE/DELETE statements, which no mapper
+# event sees, and which rows they hit isn't known up front. So any of them
+# drops every cached principal once its transaction commits; user writes are
+# rare. Post-count bumps change nothing a principal is checked on and opt out
+# with the counters_only execution option.
+@event.listens_for(Session, "do_orm_execute")
+def _note_user_write(execute_state):
+    if (
+        (execute_state.is_update or execute_state.is_delete)
+        and execute_state.statement.table.name == User.__tablename__
+        and not execute_state.execution_options.get("counters_only", False)
+    ):
+        execute_state.session.info["users_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals(session):
+    if session.info.pop("users_changed", False):
+        principal_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_user_write(session):
+    session.info.pop("users_changed", None)
+
 
 async def get_user(db: Session, username: str):
-    return (await db.execute(select(User).filter(User.username == username))).scalars().first()
+    return (await db.execute(USER_BY_USERNAME, {"username": username})).scalars().first()
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_session)):
+    started = time.perf_counter()
+    try:
+        return await resolve_user(token, db)
+    finally:
+        record_auth(time.perf_counter() - started)
+
+
+async def resolve_user(token: str, db: AsyncSession):
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -40,4 +85,6 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: As
     user = await get_user(db, username=token_data.username)
     if user is None:
         raise credentials_exception
+    expires_at = payload.get("exp")
+    principal_cache.set(token, user, None if expires_at is None else expires_at - time.time())
     return user
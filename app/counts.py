@@ -0,0 +1,96 @@
+import asyncio
+from collections import Counter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import bindparam, false, func, select, update
+
+from app.database.database import SessionLocal
+from app.env import RECONCILE_BATCH_SIZE
+from app.models import Post, Tag, User
+from app.models.post_tag import post_tag_table
+
+
+posts_table = Post.__table__
+tags_table = Tag.__table__
+users_table = User.__table__
+
+# post_count is the number of live posts linked to a tag / written by a user.
+# Bumping it is not an edit of the row, so updated_at is left untouched.
+bump_tags = (
+    update(tags_table)
+    .where(tags_table.c.id == bindparam("tag_id"))
+    .values(post_count=tags_table.c.post_count + bindparam("delta"), updated_at=tags_table.c.updated_at)
+)
+bump_users = (
+    update(users_table)
+    .where(users_table.c.id == bindparam("user_id"))
+    .values(post_count=users_table.c.post_count + bindparam("delta"), updated_at=users_table.c.updated_at)
+    .execution_options(counters_only=True)
+)
+
+
+async def adjust_post_counts(db: AsyncSession, users: Counter, tags: Counter):
+    user_rows = [{"user_id": user_id, "delta": delta} for user_id, delta in users.items() if delta]
+    tag_rows = [{"tag_id": tag_id, "delta": delta} for tag_id, delta in tags.items() if delta]
+    if user_rows:
+        await db.execute(bump_users, user_rows)
+    if tag_rows:
+        await db.execute(bump_tags, tag_rows)
+
+
+async def forget_post(db: AsyncSession, post_id: int, user_id: int) -> list[int]:
+    await db.execute(bump_users, {"user_id": user_id, "delta": -1})
+    result = await db.execute(
+        update(tags_table)
+        .where(tags_table.c.id.in_(
+            select(post_tag_table.c.tag_id).where(post_tag_table.c.post_id == post_id)))
+        .values(post_count=tags_table.c.post_count - 1, updated_at=tags_table.c.updated_at)
+        .returning(tags_table.c.id)
+    )
+    return result.scalars().all()
+
+
+def live_post_count(table):
+    if table is tags_table:
+        query = (
+            select(func.count())
+            .select_from(post_tag_table.join(posts_table, posts_table.c.id == post_tag_table.c.post_id))
+            .where(post_tag_table.c.tag_id == tags_table.c.id)
+        )
+    else:
+        query = select(func.count()).select_from(posts_table).where(posts_table.c.user_id == users_table.c.id)
+    return query.where(posts_table.c.is_deleted == false()).scalar_subquery()
+
+
+async def reconcile_chunk(table, after_id: int, batch_size: int) -> tuple[int | None, int]:
+    async with SessionLocal() as db:
+        ids = (await db.scalars(
+            select(table.c.id).where(table.c.id > after_id).order_by(table.c.id).limit(batch_size)
+        )).all()
+        if not ids:
+            return None, 0
+        count = live_post_count(table)
+        result = await db.execute(
+            update(table)
+            .where(table.c.id.in_(ids), table.c.post_count != count)
+            .values(post_count=count, updated_at=table.c.updated_at)
+            .execution_options(counters_only=True)
+        )
+        await db.commit()
+        return ids[-1], result.rowcount
+
+
+async def reconcile_post_counts(batch_size: int = RECONCILE_BATCH_SIZE) -> dict:
+    fixed = {}
+    for table in (tags_table, users_table):
+        total, after_id = 0, 0
+        while after_id is not None:
+            after_id, count = await reconcile_chunk(table, after_id, batch_size)
+            total += count
+            await asyncio.sleep(0)
+        fixed[table.name] = total
+    return fixed
+
+
+if __name__ == "__main__":
+    print(asyncio.run(reconcile_post_counts()))
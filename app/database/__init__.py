@@ -1,2 +1,2 @@
-from .base import Base
-from .database import get_session
+from .base import Base, RELATIONSHIP_LAZY
+from .database import get_session, get_read_session
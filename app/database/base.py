@@ -1,3 +1,10 @@
 from sqlalchemy.orm import declarative_base
 
+from app.env import STRICT_LOADING
+
 Base = declarative_base()
+
+# Default loader strategy for every relationship in app.models. Under
+# STRICT_LOADING a relationship that was not eagerly loaded raises instead
+# of silently issuing another query.
+RELATIONSHIP_LAZY = "raise" if STRICT_LOADING else "select"
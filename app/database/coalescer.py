@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.env import WRITE_BATCH_MAX, WRITE_BATCH_LATENCY_MS
+from .database import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+WriteUnit = Callable[[AsyncSession], Awaitable[T]]
+
+
+class WriteCoalescer:
+    def __init__(self, session_factory, max_batch: int, max_latency: float):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.batches = 0
+        self.units = 0
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Write coalescer stopped"))
+
+    async def submit(self, unit: WriteUnit[T]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((unit, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_latency
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._apply(batch)
+            except Exception as exc:
+                logger.exception("Coalesced write batch failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    async def _apply(self, batch: list):
+        outcomes = []
+        async with self.session_factory() as session:
+            for unit, future in batch:
+                if future.cancelled():
+                    continue
+                # Each unit gets a savepoint, so one failing request rolls
+                # back only its own changes and the rest still commit.
+                try:
+                    async with session.begin_nested():
+                        result = await unit(session)
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+                else:
+                    outcomes.append((future, result, None))
+            await session.commit()
+        self.batches += 1
+        self.units += len(outcomes)
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+
+write_coalescer = WriteCoalescer(SessionLocal, WRITE_BATCH_MAX, WRITE_BATCH_LATENCY_MS / 1000)
+
+
+async def run_write(db: AsyncSession, unit: WriteUnit[T]) -> T:
+    if not write_coalescer.running:
+        result = await unit(db)
+        await db.commit()
+        return result
+    # Give the request's connection back first: with a single writer
+    # connection the coalescer could otherwise never get one.
+    await db.close()
+    return await write_coalescer.submit(unit)
@@ -1,20 +1,134 @@
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from typing import AsyncGenerator
 
-from app.env import DATABASE_URL
+from app.env import (
+    DATABASE_URL, SQL_ECHO, SQLITE_PROFILE, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KB, READ_POOL_SIZE, WRITE_COALESCING,
+    QUERY_CACHE_SIZE, READ_REPLICA_URLS, READ_ROUTING, REPLICA_MAX_LAG_SECONDS, REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS
+)
+from app.metrics import instrument_engine
+from app.search import ensure_search_index
 from .base import Base
+from .routing import Replica, ReadRouter
+
+
+def sqlite_pragmas(query_only: bool) -> list:
+    pragmas = [
+        f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA foreign_keys = ON",
+    ]
+    if query_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def apply_pragmas(engine, pragmas: list):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def emit_begin(engine, begin: str) -> list:
+    # pysqlite's own transaction handling breaks SAVEPOINT; let SQLAlchemy
+    # emit BEGIN itself so nested transactions work on the writer. Returns
+    # the (event, listener) pairs installed, for event.remove().
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    def _begin(conn):
+        conn.exec_driver_sql(begin)
+
+    listeners = [("connect", _disable_driver_transactions), ("begin", _begin)]
+    for name, listener in listeners:
+        event.listen(engine.sync_engine, name, listener)
+    return listeners
+
+
+url = make_url(DATABASE_URL)
+tuned_sqlite = (
+    SQLITE_PROFILE == "performance"
+    and url.get_backend_name() == "sqlite"
+    and url.database not in (None, "", ":memory:")
+)
+
+if tuned_sqlite:
+    # SQLite allows one writer at a time: funnel writes through a single
+    # connection instead of letting them fight over the lock, and serve
+    # reads from a separate pool that WAL lets run alongside the writer.
+    engine = create_async_engine(
+        DATABASE_URL, echo=SQL_ECHO, query_cache_size=QUERY_CACHE_SIZE, pool_size=1, max_overflow=0)
+    read_engine = create_async_engine(
+        DATABASE_URL, echo=SQL_ECHO, query_cache_size=QUERY_CACHE_SIZE, pool_size=READ_POOL_SIZE, max_overflow=0)
+    apply_pragmas(engine, sqlite_pragmas(query_only=False))
+    apply_pragmas(read_engine, sqlite_pragmas(query_only=True))
+else:
+    engine = read_engine = create_async_engine(DATABASE_URL, echo=SQL_ECHO, query_cache_size=QUERY_CACHE_SIZE)
+
+# Only group commit needs SAVEPOINT. Elsewhere pysqlite keeps beginning
+# transactions at the first write, which waits out busy_timeout for a lock
+# held by another process. A deferred BEGIN would instead fail at once with
+# "database is locked" when a transaction that has read tries to write after
+# another connection committed, so the dedicated writer takes the write lock
+# up front. The shared engine outside the tuned profile also serves reads,
+# which must not queue for the write lock.
+if url.get_backend_name() == "sqlite" and WRITE_COALESCING:
+    emit_begin(engine, "BEGIN IMMEDIATE" if tuned_sqlite else "BEGIN")
+
+instrument_engine(engine, "writer" if read_engine is not engine else "primary")
+if read_engine is not engine:
+    instrument_engine(read_engine, "reader")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
 SessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = sessionmaker(
+    bind=read_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def replica_engine(replica_url: str):
+    if make_url(replica_url).get_backend_name() != "sqlite":
+        return create_async_engine(replica_url, echo=SQL_ECHO, query_cache_size=QUERY_CACHE_SIZE)
+    sqlite_replica = create_async_engine(
+        replica_url, echo=SQL_ECHO, query_cache_size=QUERY_CACHE_SIZE, pool_size=READ_POOL_SIZE, max_overflow=0)
+    apply_pragmas(sqlite_replica, sqlite_pragmas(query_only=True))
+    return sqlite_replica
+
 
+replicas = []
+for number, replica_url in enumerate(READ_REPLICA_URLS, start=1):
+    name, replica = f"replica{number}", replica_engine(replica_url)
+    instrument_engine(replica, name)
+    replicas.append(Replica(name, replica, sessionmaker(bind=replica, class_=AsyncSession, expire_on_commit=False)))
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+read_router = ReadRouter(
+    ReadSessionLocal, replicas, READ_ROUTING, REPLICA_MAX_LAG_SECONDS, REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS)
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         yield session
+    # Runs before the response is sent, so the client's next read already
+    # goes to the primary.
+    read_router.wrote(request)
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with read_router.session(read_router.sticky(request)) as session:
+        yield session
 
 
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await ensure_search_index(conn)
@@ -0,0 +1,105 @@
+import asyncio
+import itertools
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class Replica:
+    def __init__(self, name: str, engine, sessions):
+        self.name = name
+        self.engine = engine
+        self.sessions = sessions
+        self.healthy = True
+        self.in_flight = 0
+
+
+class ReadRouter:
+    # Hands read sessions out across the replicas, skipping unhealthy ones and
+    # falling back to the primary's read pool when none is left. Clients that
+    # wrote within the last max_lag seconds read from the primary, so they
+    # see their own writes however far behind the replicas are.
+    def __init__(self, primary, replicas: list[Replica], policy: str, max_lag: float, timeout: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.policy = policy
+        self.max_lag = max_lag
+        self.timeout = timeout
+        self.routed = defaultdict(int)
+        self._turn = itertools.count()
+        self._writers = TTLCache(100000, max_lag)
+
+    @staticmethod
+    def client(request: Request) -> str | None:
+        return request.headers.get("authorization")
+
+    def wrote(self, request: Request):
+        client = self.client(request)
+        if self.replicas and client is not None and request.method in WRITE_METHODS:
+            self._writers.set(client, True)
+
+    def sticky(self, request: Request) -> bool:
+        if not self.replicas:
+            return False
+        client = self.client(request)
+        return client is not None and self._writers.peek(client, False)
+
+    def pick(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.policy == "least_busy":
+            start = next(self._turn) % len(healthy)
+            rotated = healthy[start:] + healthy[:start]
+            return min(rotated, key=lambda replica: replica.in_flight)
+        return healthy[next(self._turn) % len(healthy)]
+
+    @asynccontextmanager
+    async def session(self, primary: bool = False) -> AsyncIterator[AsyncSession]:
+        replica = None if primary else self.pick()
+        if replica is None:
+            self.routed["sticky" if primary else "primary"] += 1
+            async with self.primary() as session:
+                yield session
+            return
+
+        self.routed[replica.name] += 1
+        replica.in_flight += 1
+        try:
+            async with replica.sessions() as session:
+                session.info["replica"] = replica.name
+                yield session
+        finally:
+            replica.in_flight -= 1
+
+    async def check(self):
+        for replica in self.replicas:
+            try:
+                async with asyncio.timeout(self.timeout):
+                    async with replica.engine.connect() as conn:
+                        await conn.execute(text("SELECT 1"))
+            except Exception:
+                if replica.healthy:
+                    logger.warning("Read replica %s failed its health check", replica.name, exc_info=True)
+                replica.healthy = False
+            else:
+                if not replica.healthy:
+                    logger.info("Read replica %s is back", replica.name)
+                replica.healthy = True
+
+    async def check_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.check()
@@ -7,3 +7,89 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", "64"))
+HASH_RETRY_AFTER_SECONDS = int(os.getenv("HASH_RETRY_AFTER_SECONDS", "1"))
+
+# Admission control: requests beyond the in-flight limits wait in a bounded
+# queue (reads first, then writes, then logins/signups) and are shed with 503
+# once it is full or they have waited too long.
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "256"))
+ADMISSION_AUTH_CONCURRENCY = int(os.getenv("ADMISSION_AUTH_CONCURRENCY", str(HASH_WORKERS + HASH_QUEUE_DEPTH)))
+ADMISSION_WRITE_CONCURRENCY = int(os.getenv("ADMISSION_WRITE_CONCURRENCY", "64"))
+ADMISSION_QUEUE_DEPTH = int(os.getenv("ADMISSION_QUEUE_DEPTH", "512"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+# Per-client token buckets (authenticated user, else client IP); 0 disables.
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_CLIENTS = int(os.getenv("RATE_LIMIT_CLIENTS", "100000"))
+
+POST_BATCH_MAX_SIZE = int(os.getenv("POST_BATCH_MAX_SIZE", "1000"))
+# Largest ?limit= a listing accepts.
+PAGE_MAX_SIZE = int(os.getenv("PAGE_MAX_SIZE", "100"))
+
+# Posts read per query (and per short read transaction) by /posts/export.
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+# The response cache lives in each worker and only writes made by that worker
+# evict from it: with several workers, a response (and its ETag) can be up to
+# this stale. Raise it when running a single worker.
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "5"))
+# Requests that may share one in-flight read with an identical request; any
+# beyond that run their own query.
+SINGLEFLIGHT_MAX_WAITERS = int(os.getenv("SINGLEFLIGHT_MAX_WAITERS", "1000"))
+
+# Encode responses with orjson (if installed) or pydantic-core instead of json.
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+PURGE_INTERVAL_SECONDS = float(os.getenv("PURGE_INTERVAL_SECONDS", "3600"))
+PURGE_RETENTION_SECONDS = float(os.getenv("PURGE_RETENTION_SECONDS", str(7 * 24 * 3600)))
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+
+# How often each worker checks whether another one changed the tag set.
+TAG_INDEX_REFRESH_SECONDS = float(os.getenv("TAG_INDEX_REFRESH_SECONDS", "5"))
+
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "1000"))
+
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+# Compiled statements kept per engine (SQLAlchemy's default is 500).
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "500"))
+# "create_all" creates missing tables on boot; "check" only verifies that the
+# database is at the Alembic head and refuses to start otherwise.
+STARTUP_MODE = os.getenv("STARTUP_MODE", "create_all")
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "true").lower() in ("1", "true", "yes")
+# "performance" enables WAL, the pragmas below and split reader/writer pools;
+# "default" keeps the stock aiosqlite engine. Ignored for other databases.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance")
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+READ_POOL_SIZE = int(os.getenv("READ_POOL_SIZE", "4"))
+# Comma-separated read replica URLs (for SQLite, any path to the same file
+# works, opened read-only). Empty serves reads from the primary.
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()]
+# "round_robin" or "least_busy" (fewest sessions open).
+READ_ROUTING = os.getenv("READ_ROUTING", "round_robin")
+# Clients read from the primary for this long after a write, and responses
+# read from a replica this soon after one aren't cached.
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "5"))
+REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS", "1"))
+
+# Opt-in group commit: writes from concurrent requests share one transaction.
+WRITE_COALESCING = os.getenv("WRITE_COALESCING", "false").lower() in ("1", "true", "yes")
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "64"))
+WRITE_BATCH_LATENCY_MS = float(os.getenv("WRITE_BATCH_LATENCY_MS", "2"))
+
+# Development/test guards: make relationships raise instead of lazy loading,
+# and fail requests that issue more SQL statements than their route's budget.
+STRICT_LOADING = os.getenv("STRICT_LOADING", "false").lower() in ("1", "true", "yes")
+ENFORCE_QUERY_BUDGETS = os.getenv("ENFORCE_QUERY_BUDGETS", "false").lower() in ("1", "true", "yes")
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from pydantic import create_model
+
+from app.schemas.post import BasePost, PostAuthor, PostTag
+from app.schemas.tag import BaseTag, TagPost
+
+
+# Selectable fields and relations, in the order they appear in responses.
+POST_FIELDS = {"id": int, "title": str, "content": str, "user_id": Optional[int]}
+POST_RELATIONS = {"tags": List[PostTag], "author": Optional[PostAuthor]}
+TAG_FIELDS = {"id": int, "name": str, "post_count": int}
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    fields: tuple[str, ...]
+    include: tuple[str, ...] = ()
+
+
+DEFAULT_POST = FieldSet(("title", "content"), ("tags",))
+DEFAULT_TAG_POST = FieldSet(("id", "title", "content"))
+DEFAULT_TAG = FieldSet(("name", "post_count"))
+
+# The default shapes keep their documented models, so leaving out ?fields=
+# and ?include= returns exactly what it did before.
+DEFAULT_MODELS = {DEFAULT_POST: BasePost, DEFAULT_TAG_POST: TagPost, DEFAULT_TAG: BaseTag}
+
+
+def parse_names(value: str, allowed: dict, what: str) -> tuple[str, ...]:
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(names - allowed.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {what}: {unknown}"
+        )
+    return tuple(name for name in allowed if name in names)
+
+
+def parse_fieldset(fields: str | None, include: str | None, default: FieldSet, allowed: dict) -> FieldSet:
+    # Asking for specific fields drops the default relations; ask for those
+    # with ?include= as well.
+    if fields is None and include is None:
+        return default
+    return FieldSet(
+        default.fields if fields is None else parse_names(fields, allowed, "fields"),
+        () if include is None else parse_names(include, POST_RELATIONS, "include")
+    )
+
+
+def post_fieldset(fields: str | None = None, include: str | None = None) -> FieldSet:
+    return parse_fieldset(fields, include, DEFAULT_POST, POST_FIELDS)
+
+
+def tag_post_fieldset(fields: str | None = None, include: str | None = None) -> FieldSet:
+    return parse_fieldset(fields, include, DEFAULT_TAG_POST, POST_FIELDS)
+
+
+def tag_fieldset(fields: str | None = None) -> FieldSet:
+    return parse_fieldset(fields, None, DEFAULT_TAG, TAG_FIELDS)
+
+
+def post_columns(fieldset: FieldSet) -> tuple[str, ...]:
+    # id is always read: relations and cursors are keyed by it.
+    needed = {"id", *fieldset.fields, *(["user_id"] if "author" in fieldset.include else [])}
+    return tuple(name for name in POST_FIELDS if name in needed)
+
+
+def tag_columns(fieldset: FieldSet, *keys: str) -> tuple[str, ...]:
+    needed = {"id", *fieldset.fields, *keys}
+    return tuple(name for name in TAG_FIELDS if name in needed)
+
+
+@lru_cache
+def post_model(fieldset: FieldSet):
+    return DEFAULT_MODELS.get(fieldset) or create_model(
+        "PostFields",
+        **{name: (POST_FIELDS[name], ...) for name in fieldset.fields},
+        **{name: (POST_RELATIONS[name], ...) for name in fieldset.include}
+    )
+
+
+@lru_cache
+def tag_model(fieldset: FieldSet):
+    return DEFAULT_MODELS.get(fieldset) or create_model(
+        "TagFields", **{name: (TAG_FIELDS[name], ...) for name in fieldset.fields})
@@ -0,0 +1,52 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.env import HASH_WORKERS, HASH_QUEUE_DEPTH, HASH_RETRY_AFTER_SECONDS
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers: int, max_pending: int, name: str):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = None
+        self.limit = max_workers + max_pending
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, retry later",
+                headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Password hashing. bcrypt releases the GIL, so a thread pool keeps the
+# event loop free while still bounding how much CPU logins can take.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+hash_pool = BoundedExecutor(HASH_WORKERS, HASH_QUEUE_DEPTH, "bcrypt")
+
+
+async def get_password_hash(password):
+    return await hash_pool.run(pwd_context.hash, password)
+
+
+async def verify_password(plain_password, hashed_password):
+    return await hash_pool.run(pwd_context.verify, plain_password, hashed_password)
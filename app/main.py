@@ -1,16 +1,52 @@
+import asyncio
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
-from app.database.database import init_db
-from app.routers import users, posts, tags
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager, suppress
+from app.admission import AdmissionMiddleware
+from app.database.coalescer import write_coalescer
+from app.database.database import read_router
+from app.env import (
+    FAST_JSON_RESPONSES, PURGE_INTERVAL_SECONDS, REPLICA_HEALTH_CHECK_SECONDS, TAG_INDEX_REFRESH_SECONDS,
+    WRITE_COALESCING
+)
+from app.hashing import hash_pool
+from app.metrics import TimingMiddleware
+from app.purge import purge_forever
+from app.responses import FastJSONResponse
+from app.routers import users, posts, tags, metrics
+from app.startup import startup
+from app.tag_index import tag_index
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
+    await startup()
+    purge_task = asyncio.create_task(purge_forever()) if PURGE_INTERVAL_SECONDS > 0 else None
+    tag_index_task = asyncio.create_task(tag_index.refresh_forever()) if TAG_INDEX_REFRESH_SECONDS > 0 else None
+    replica_task = (
+        asyncio.create_task(read_router.check_forever(REPLICA_HEALTH_CHECK_SECONDS))
+        if read_router.replicas and REPLICA_HEALTH_CHECK_SECONDS > 0 else None
+    )
+    if WRITE_COALESCING:
+        write_coalescer.start()
     yield
+    await write_coalescer.stop()
+    for task in (purge_task, tag_index_task, replica_task):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    hash_pool.shutdown()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse if FAST_JSON_RESPONSES else JSONResponse
+)
+# Timing is outermost, so time spent queued for admission shows up in it.
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(TimingMiddleware)
 
 app.include_router(users.router)
 app.include_router(posts.router)
 app.include_router(tags.router)
+app.include_router(metrics.router)
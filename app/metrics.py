@@ -0,0 +1,232 @@
+import functools
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+from app.env import ENFORCE_QUERY_BUDGETS
+
+
+@dataclass
+class RequestTimings:
+    started: float
+    queries: int = 0
+    db: float = 0.0
+    auth: float = 0.0
+    handler: float = 0.0
+    handler_finished: float | None = None
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar("current_timings", default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+# Requests that went over their route's budget, keyed by endpoint
+# "module.qualname".
+budget_violations: dict[str, int] = defaultdict(int)
+
+
+def query_budget(statements: int):
+    # Maximum SQL statements per request, dependencies included. Goes under
+    # the route decorator; TimedRoute checks it after the endpoint returns.
+    def register(endpoint):
+        endpoint.query_budget = statements
+        return endpoint
+    return register
+
+
+def check_query_budget(endpoint, timings: RequestTimings):
+    budget = getattr(endpoint, "query_budget", None)
+    if budget is None or timings.queries <= budget:
+        return
+    name = f"{endpoint.__module__}.{endpoint.__qualname__}"
+    budget_violations[name] += 1
+    if ENFORCE_QUERY_BUDGETS:
+        raise QueryBudgetExceeded(f"{name} issued {timings.queries} SQL statements, budget is {budget}")
+
+
+@contextmanager
+def untimed():
+    # For work a request triggers on behalf of shared state (e.g. reloading
+    # the tag index): keep it out of the request's timings and query budget.
+    token = current_timings.set(None)
+    try:
+        yield
+    finally:
+        current_timings.reset(token)
+
+
+# Compiled statement cache lookups per engine: hit, miss or uncached (raw
+# SQL such as BEGIN, which has no cache key).
+statement_cache: dict[tuple[str, str], int] = defaultdict(int)
+CACHE_OUTCOMES = {CACHE_HIT: "hit", CACHE_MISS: "miss"}
+
+
+def record_auth(seconds: float):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.auth += seconds
+
+
+def instrument_engine(engine, name: str):
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        statement_cache[name, CACHE_OUTCOMES.get(getattr(context, "cache_hit", None), "uncached")] += 1
+        timings = current_timings.get()
+        if timings is not None:
+            timings.queries += 1
+            timings.db += elapsed
+
+
+class TimedRoute(APIRoute):
+    # Times the endpoint body itself; what happens between its return and
+    # the response start (validation and encoding) is serialisation time.
+    def __init__(self, path, endpoint, **kwargs):
+        # include_router() rebuilds routes from the already wrapped endpoint.
+        if getattr(endpoint, "timed", False):
+            super().__init__(path, endpoint, **kwargs)
+            return
+
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            timings = current_timings.get()
+            started = time.perf_counter()
+            try:
+                result = await endpoint(*args, **kwargs)
+            finally:
+                if timings is not None:
+                    timings.handler_finished = time.perf_counter()
+                    timings.handler += timings.handler_finished - started
+            if timings is not None:
+                check_query_budget(endpoint, timings)
+            return result
+
+        timed_endpoint.timed = True
+        super().__init__(path, timed_endpoint, **kwargs)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+HISTOGRAMS = {
+    "app_request_duration_seconds": ("Total time spent in the application per request.", SECONDS_BUCKETS),
+    "app_request_db_seconds": ("Time spent executing SQL per request.", SECONDS_BUCKETS),
+    "app_request_auth_seconds": ("Time spent resolving the current user per request.", SECONDS_BUCKETS),
+    "app_request_handler_seconds": ("Time spent in the route handler per request.", SECONDS_BUCKETS),
+    "app_request_serialize_seconds": ("Time from handler return to response start.", SECONDS_BUCKETS),
+    "app_request_queries": ("SQL statements executed per request.", QUERY_BUCKETS),
+}
+
+histograms = {name: defaultdict(functools.partial(Histogram, buckets)) for name, (_, buckets) in HISTOGRAMS.items()}
+
+
+def observe(labels: tuple, timings: RequestTimings, total: float, serialize: float):
+    histograms["app_request_duration_seconds"][labels].observe(total)
+    histograms["app_request_db_seconds"][labels].observe(timings.db)
+    histograms["app_request_auth_seconds"][labels].observe(timings.auth)
+    histograms["app_request_handler_seconds"][labels].observe(timings.handler)
+    histograms["app_request_serialize_seconds"][labels].observe(serialize)
+    histograms["app_request_queries"][labels].observe(timings.queries)
+
+
+def server_timing(timings: RequestTimings, total: float, serialize: float) -> str:
+    return ", ".join([
+        f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries"',
+        f"auth;dur={timings.auth * 1000:.2f}",
+        f"handler;dur={timings.handler * 1000:.2f}",
+        f"serialize;dur={serialize * 1000:.2f}",
+        f"total;dur={total * 1000:.2f}",
+    ])
+
+
+class TimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(started=time.perf_counter())
+        token = current_timings.set(timings)
+        status = {}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                total = now - timings.started
+                serialize = now - timings.handler_finished if timings.handler_finished else 0.0
+                status.update(code=message["status"], total=total, serialize=serialize)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timings, total, serialize).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            route = scope.get("route")
+            if status:
+                labels = (scope["method"], route.path if route is not None else "unmatched")
+                observe(labels, timings, status["total"], status["serialize"])
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+def render(counters: list) -> str:
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (method, route), histogram in sorted(histograms[name].items()):
+            labels = format_labels({"method": method, "route": route})
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    # counters: (name, type, help, labels, value)
+    seen = set()
+    for name, kind, help_text, labels, value in counters:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name}{{{format_labels(labels)}}} {value}" if labels else f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -1,5 +1,5 @@
-from sqlalchemy import Boolean, Column, TIMESTAMP, func
-from sqlalchemy.orm import declared_attr
+from sqlalchemy import Boolean, Column, TIMESTAMP, event, false, func
+from sqlalchemy.orm import Session, declared_attr, with_loader_criteria
 
 
 class SoftDeleteMixin:
@@ -18,3 +18,26 @@ class TimestampMixin:
     @declared_attr
     def __mapper_args__(cls):
         return {"eager_defaults": True}
+
+
+# Soft-deleted rows are invisible to every ORM SELECT, including the
+# relationship loads it triggers, unless the statement is executed with
+# execution_options(include_deleted=True), or marked live_only=True because it
+# filters on is_deleted itself (see app.queries). The criteria renders as a
+# literal "is_deleted = 0/false" so the partial indexes on live rows can be used.
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_soft_deleted(execute_state):
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+        and not execute_state.execution_options.get("live_only", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                SoftDeleteMixin,
+                lambda cls: cls.is_deleted == false(),
+                include_aliases=True,
+            )
+        )
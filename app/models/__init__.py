@@ -1,3 +1,4 @@
 from .user import User
 from .post import Post
 from .tag import Tag
+from .tag_version import tag_version_table
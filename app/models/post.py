@@ -1,19 +1,25 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.asyncio import AsyncAttrs
-from app.database import Base
+from app.database import Base, RELATIONSHIP_LAZY
 from app.mixins import SoftDeleteMixin, TimestampMixin
 from .post_tag import post_tag_table
 
 
 class Post(TimestampMixin, SoftDeleteMixin, Base, AsyncAttrs):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_live_id", "id",
+              sqlite_where=text("is_deleted = 0"),
+              postgresql_where=text("is_deleted = false")),
+        Index("ix_posts_user_id_id", "user_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     content = Column(String, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
 
-    author = relationship("User", back_populates="posts")
+    author = relationship("User", back_populates="posts", lazy=RELATIONSHIP_LAZY)
     tags = relationship("Tag", secondary=post_tag_table,
-                        back_populates="posts")
+                        back_populates="posts", lazy=RELATIONSHIP_LAZY)
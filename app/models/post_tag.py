@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Table
+from sqlalchemy import Column, Integer, ForeignKey, Index, Table
 from app.database import Base
 
 post_tag_table = Table(
@@ -6,4 +6,5 @@ post_tag_table = Table(
     Base.metadata,
     Column("post_id", Integer, ForeignKey("posts.id"), primary_key=True),
     Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+    Index("ix_post_tag_tag_id_post_id", "tag_id", "post_id"),
 )
@@ -1,16 +1,28 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.asyncio import AsyncAttrs
-from app.database import Base
+from app.database import Base, RELATIONSHIP_LAZY
 from app.mixins import SoftDeleteMixin, TimestampMixin
 from .post_tag import post_tag_table
 
 
 class Tag(TimestampMixin, SoftDeleteMixin, Base, AsyncAttrs):
     __tablename__ = "tags"
+    __table_args__ = (
+        Index("ix_tags_live_id", "id",
+              sqlite_where=text("is_deleted = 0"),
+              postgresql_where=text("is_deleted = false")),
+        # Names are unique among live tags only, so deleting a tag frees its
+        # name straight away rather than when the purge removes the row.
+        Index("ix_tags_live_name", "name", unique=True,
+              sqlite_where=text("is_deleted = 0"),
+              postgresql_where=text("is_deleted = false")),
+        Index("ix_tags_post_count_id", "post_count", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String, nullable=False)
+    post_count = Column(Integer, default=0, server_default="0", nullable=False)
 
     posts = relationship("Post", secondary=post_tag_table,
-                         back_populates="tags")
+                         back_populates="tags", lazy=RELATIONSHIP_LAZY)
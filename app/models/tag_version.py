@@ -0,0 +1,13 @@
+from sqlalchemy import DDL, Column, Integer, Table, event
+from app.database import Base
+
+# Single-row counter bumped by every tag write, so each worker can tell when
+# its in-memory tag index (app.tag_index) has fallen behind.
+tag_version_table = Table(
+    "tag_version",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False, server_default="0"),
+)
+
+event.listen(tag_version_table, "after_create", DDL("INSERT INTO tag_version (id, version) VALUES (1, 0)"))
@@ -1,16 +1,22 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.asyncio import AsyncAttrs
-from app.database import Base
+from app.database import Base, RELATIONSHIP_LAZY
 from app.mixins import SoftDeleteMixin, TimestampMixin
 
 
 class User(TimestampMixin, SoftDeleteMixin, Base, AsyncAttrs):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_live_username", "username",
+              sqlite_where=text("is_deleted = 0"),
+              postgresql_where=text("is_deleted = false")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
+    post_count = Column(Integer, default=0, server_default="0", nullable=False)
 
-    posts = relationship("Post", back_populates="author")
+    posts = relationship("Post", back_populates="author", lazy=RELATIONSHIP_LAZY)
@@ -0,0 +1,43 @@
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.queries import AUTHORS_BY_ID, TAGS_FOR_POSTS
+
+
+async def tags_by_post(db: AsyncSession, post_ids: Iterable[int]) -> dict[int, list[dict]]:
+    tags = defaultdict(list)
+    post_ids = list(post_ids)
+    if not post_ids:
+        return tags
+    result = await db.execute(TAGS_FOR_POSTS, {"post_ids": post_ids})
+    for post_id, tag_id, name in result:
+        tags[post_id].append({"id": tag_id, "name": name})
+    return tags
+
+
+async def authors_by_id(db: AsyncSession, user_ids: Iterable[int]) -> dict[int, dict]:
+    user_ids = list(set(user_ids) - {None})
+    if not user_ids:
+        return {}
+    result = await db.execute(AUTHORS_BY_ID, {"user_ids": user_ids})
+    return {user_id: {"id": user_id, "username": username} for user_id, username in result}
+
+
+async def post_payloads(db: AsyncSession, rows, include=("tags",)) -> list[dict]:
+    # Relations are only queried for when included.
+    payloads = [dict(row._mapping) for row in rows]
+    if "tags" in include:
+        tags = await tags_by_post(db, (row.id for row in rows))
+        for payload in payloads:
+            payload["tags"] = tags.get(payload["id"], [])
+    if "author" in include:
+        authors = await authors_by_id(db, (row.user_id for row in rows))
+        for payload in payloads:
+            payload["author"] = authors.get(payload["user_id"])
+    return payloads
+
+
+def tag_payloads(rows) -> list[dict]:
+    return [dict(row._mapping) for row in rows]
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.sql import delete, select, true
+
+from app.database.database import SessionLocal
+from app.env import PURGE_BATCH_SIZE, PURGE_INTERVAL_SECONDS, PURGE_RETENTION_SECONDS
+from app.models import Post, Tag
+from app.models.post_tag import post_tag_table
+
+
+logger = logging.getLogger(__name__)
+
+# Each model is purged together with its post_tag rows, keyed by this column.
+PURGE_TARGETS = [(Post, post_tag_table.c.post_id), (Tag, post_tag_table.c.tag_id)]
+
+
+async def purge_chunk(model, link_column, cutoff: datetime, batch_size: int) -> int:
+    async with SessionLocal() as db:
+        ids = (await db.scalars(
+            select(model.id)
+            .filter(model.is_deleted == true(), model.updated_at < cutoff)
+            .order_by(model.id)
+            .limit(batch_size)
+            .execution_options(include_deleted=True)
+        )).all()
+        if ids:
+            await db.execute(delete(post_tag_table).where(link_column.in_(ids)))
+            await db.execute(
+                delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+            await db.commit()
+        return len(ids)
+
+
+async def purge_deleted(
+    retention_seconds: float = PURGE_RETENTION_SECONDS,
+    batch_size: int = PURGE_BATCH_SIZE
+) -> dict:
+    # Timestamps are stored as naive UTC by CURRENT_TIMESTAMP.
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=retention_seconds)
+    purged = {}
+    for model, link_column in PURGE_TARGETS:
+        total = 0
+        # Small transactions, yielding between them, so the purge never holds
+        # the write lock for long.
+        while count := await purge_chunk(model, link_column, cutoff, batch_size):
+            total += count
+            await asyncio.sleep(0)
+        purged[model.__tablename__] = total
+    return purged
+
+
+async def purge_forever(interval_seconds: float = PURGE_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            purged = await purge_deleted()
+            logger.info("Purged soft-deleted rows: %s", purged)
+        except Exception:
+            logger.exception("Purge of soft-deleted rows failed")
+
+
+if __name__ == "__main__":
+    print(asyncio.run(purge_deleted()))
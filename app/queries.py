@@ -0,0 +1,111 @@
+from functools import lru_cache
+
+from sqlalchemy.sql import and_, bindparam, false, func, select, union
+
+from app.models import Post, Tag, User
+from app.models.post_tag import post_tag_table
+
+
+# Read paths select just these columns and build response payloads from the
+# rows, skipping ORM instances (identity map, instrumentation, timestamps).
+POST_COLUMNS = (Post.id, Post.title, Post.content)
+TAG_COLUMNS = (Tag.id, Tag.name, Tag.post_count)
+
+# The hottest statements, built once with bound parameters and executed as
+# db.execute(STATEMENT, {...}). Their cache keys are memoised on the
+# statement, and they spell out the live-row filter themselves (live_only)
+# so the soft-delete hook doesn't rebuild them on every call.
+LIVE_ONLY = {"live_only": True}
+
+USER_BY_USERNAME = (
+    select(User)
+    .filter(User.username == bindparam("username"), User.is_deleted == false())
+    .execution_options(**LIVE_ONLY)
+)
+
+POST_BY_ID = (
+    select(*POST_COLUMNS)
+    .filter(Post.id == bindparam("post_id"), Post.is_deleted == false())
+    .execution_options(**LIVE_ONLY)
+)
+
+POSTS_PAGE = (
+    select(*POST_COLUMNS)
+    .filter(Post.is_deleted == false())
+    .order_by(Post.id)
+    .limit(bindparam("limit"))
+    .offset(bindparam("skip"))
+    .execution_options(**LIVE_ONLY)
+)
+
+POSTS_PAGE_AFTER = (
+    select(*POST_COLUMNS)
+    .filter(Post.id > bindparam("after_id"), Post.is_deleted == false())
+    .order_by(Post.id)
+    .limit(bindparam("limit"))
+    .execution_options(**LIVE_ONLY)
+)
+
+TAGS_FOR_POSTS = (
+    select(post_tag_table.c.post_id, Tag.id, Tag.name)
+    .join(Tag, Tag.id == post_tag_table.c.tag_id)
+    .filter(post_tag_table.c.post_id.in_(bindparam("post_ids", expanding=True)), Tag.is_deleted == false())
+    .order_by(post_tag_table.c.post_id, post_tag_table.c.tag_id)
+    .execution_options(**LIVE_ONLY)
+)
+
+AUTHORS_BY_ID = (
+    select(User.id, User.username)
+    .filter(User.id.in_(bindparam("user_ids", expanding=True)), User.is_deleted == false())
+    .execution_options(**LIVE_ONLY)
+)
+
+TAG_BY_ID = (
+    select(*TAG_COLUMNS)
+    .filter(Tag.id == bindparam("tag_id"), Tag.is_deleted == false())
+    .execution_options(**LIVE_ONLY)
+)
+
+TAG_EXISTS = (
+    select(Tag.id)
+    .filter(Tag.id == bindparam("tag_id"), Tag.is_deleted == false())
+    .execution_options(**LIVE_ONLY)
+)
+
+
+@lru_cache
+def narrowed(statement, entity, columns: tuple[str, ...]):
+    # The same statement selecting only some of the entity's columns, built
+    # once per shape so it stays as cheap to run as the original.
+    return statement.with_only_columns(*(getattr(entity, column) for column in columns))
+
+
+def tagged_post_ids(tag_ids: list[int], match: str, after_id: int, count: int):
+    # Ids of the first `count` live posts after after_id carrying all (or any)
+    # of the tags. Every branch walks ix_post_tag_tag_id_post_id from one tag
+    # in post id order and stops after `count` rows, so a page costs the same
+    # for a tag with a million posts as for one with ten.
+    def walk(tag_filter):
+        return (
+            select(post_tag_table.c.post_id)
+            .join(Post, Post.id == post_tag_table.c.post_id)
+            .filter(tag_filter, post_tag_table.c.post_id > after_id, Post.is_deleted == false())
+            .order_by(post_tag_table.c.post_id)
+            .limit(count)
+        )
+
+    if match == "all" and len(tag_ids) > 1:
+        # Walk the tag with the fewest posts; check the others per post.
+        rarest = select(Tag.id).filter(Tag.id.in_(tag_ids)).order_by(Tag.post_count, Tag.id).limit(1)
+        others = post_tag_table.alias()
+        matched = (
+            select(func.count())
+            .select_from(others)
+            .filter(others.c.post_id == post_tag_table.c.post_id, others.c.tag_id.in_(tag_ids))
+        )
+        return walk(and_(
+            post_tag_table.c.tag_id == rarest.scalar_subquery(),
+            matched.scalar_subquery() == len(tag_ids)
+        )).subquery()
+    walks = [walk(post_tag_table.c.tag_id == tag_id).subquery() for tag_id in tag_ids]
+    return union(*(select(ids.c.post_id) for ids in walks)).subquery()
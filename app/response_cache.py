@@ -0,0 +1,122 @@
+import hashlib
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response, status
+
+from app.cache import TTLCache
+from app.database.database import read_router
+from app.env import REPLICA_MAX_LAG_SECONDS, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SECONDS
+from app.responses import encode
+from app.singleflight import single_flight
+
+
+@dataclass
+class Cacheable:
+    content: object
+    tags: set = field(default_factory=set)
+    headers: dict = field(default_factory=dict)
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    headers: dict
+    tags: frozenset
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class ResponseCache:
+    # Invalidation is local to the process: entries only leave other workers'
+    # caches when their TTL runs out, which is what bounds how stale a
+    # multi-worker deployment serves them (see RESPONSE_CACHE_TTL_SECONDS).
+    # backend: any object with TTLCache's get/peek/set/pop/clear and its
+    # on_evict hook, which keeps the tag -> keys index in step with what the
+    # backend still holds, so invalidating only touches the tagged entries.
+    def __init__(self, backend):
+        self.backend = backend
+        self.backend.on_evict = self._unindex
+        self._keys = defaultdict(set)
+        self.generation = 0
+        self.invalidated_at = float("-inf")
+        self.not_modified = 0
+
+    @staticmethod
+    def key(request: Request):
+        return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+    async def serve(self, request: Request, response_model, load) -> Response:
+        # load(db) runs on a session of its own, as concurrent misses for the
+        # same response share one load and it must outlive any one request.
+        # Keying the flight by generation keeps requests that arrive after a
+        # write from joining a load that started before it, and clients
+        # that must read their own writes from one running on a replica.
+        key = self.key(request)
+        entry = self.backend.get(key)
+        if entry is None:
+            primary = read_router.sticky(request)
+            entry = await single_flight.do(
+                ("response", self.generation, primary, key), lambda: self._fill(key, response_model, load, primary))
+
+        headers = {**entry.headers, "ETag": entry.etag}
+        if etag_matches(request, entry.etag):
+            self.not_modified += 1
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    async def _fill(self, key, response_model, load, primary: bool) -> CacheEntry:
+        generation = self.generation
+        started = time.monotonic()
+        async with read_router.session(primary) as db:
+            result = await load(db)
+            replica = db.info.get("replica")
+        body = encode(response_model, result.content)
+        entry = CacheEntry(
+            body=body,
+            etag='"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest(),
+            headers=result.headers,
+            tags=frozenset(result.tags),
+        )
+        # A write that landed while we were loading may have made this
+        # result stale already, as may one a replica hasn't caught up with
+        # yet; serve it, but don't keep it.
+        lagging = replica is not None and started - self.invalidated_at < REPLICA_MAX_LAG_SECONDS
+        if generation == self.generation and not lagging:
+            self.backend.set(key, entry)
+            if self.backend.peek(key) is entry:
+                for tag in entry.tags:
+                    self._keys[tag].add(key)
+        return entry
+
+    def _unindex(self, key, entry: CacheEntry):
+        for tag in entry.tags:
+            keys = self._keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys[tag]
+
+    def invalidate(self, *tags: str):
+        self.generation += 1
+        self.invalidated_at = time.monotonic()
+        for tag in tags:
+            for key in self._keys.pop(tag, ()):
+                self.backend.pop(key)
+
+    def clear(self):
+        self.generation += 1
+        self.invalidated_at = time.monotonic()
+        self.backend.clear()
+        self._keys.clear()
+
+
+response_cache = ResponseCache(TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SECONDS))
@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache
+def adapter_for(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def encode(response_model, content) -> bytes:
+    # Validation and encoding both run inside pydantic-core, in one pass over
+    # the content, instead of validate -> to python -> stdlib json.
+    adapter = adapter_for(response_model)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def model_response(response_model, content, headers: dict | None = None) -> Response:
+    return Response(encode(response_model, content), media_type="application/json", headers=headers)
+
+
+class FastJSONResponse(JSONResponse):
+    # FastAPI hands over content already reduced to JSON types, so only the
+    # final dump is swapped: orjson when installed, pydantic-core otherwise.
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return to_json(content)
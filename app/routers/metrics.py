@@ -0,0 +1,98 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.admission import admission
+from app.auth import principal_cache
+from app.database.coalescer import write_coalescer
+from app.database.database import read_router
+from app.hashing import hash_pool
+from app.metrics import budget_violations, render, statement_cache
+from app.response_cache import response_cache
+from app.singleflight import single_flight
+from app.startup import startup_timings
+from app.tag_index import tag_index
+
+
+router = APIRouter(
+    tags=["Metrics"]
+)
+
+
+def collect() -> list:
+    counters = []
+    caches = {"principal": principal_cache, "response": response_cache.backend}
+    for name, kind, help_text, attribute in [
+        ("app_cache_hits_total", "counter", "Cache lookups that found an entry.", "hits"),
+        ("app_cache_misses_total", "counter", "Cache lookups that found no entry.", "misses"),
+    ]:
+        counters += [(name, kind, help_text, {"cache": cache}, getattr(backend, attribute))
+                     for cache, backend in caches.items()]
+    counters += [
+        ("app_cache_entries", "gauge", "Entries currently held.", {"cache": cache}, len(backend))
+        for cache, backend in caches.items()
+    ]
+    counters += [
+        ("app_response_not_modified_total", "counter", "Conditional reads answered with 304.", {},
+         response_cache.not_modified),
+        ("app_singleflight_in_flight", "gauge", "Distinct reads currently being shared.", {}, len(single_flight)),
+        ("app_hash_pool_in_flight", "gauge", "Password hashes running or queued.", {}, hash_pool.in_flight),
+        ("app_hash_pool_rejected_total", "counter", "Password hashes shed with 503.", {}, hash_pool.rejected),
+        ("app_write_batches_total", "counter", "Group-committed write transactions.", {}, write_coalescer.batches),
+        ("app_write_units_total", "counter", "Writes applied through group commit.", {}, write_coalescer.units),
+        ("app_tag_index_entries", "gauge", "Tags held in the in-memory tag index.", {}, len(tag_index.names)),
+        ("app_tag_index_loads_total", "counter", "Full reloads of the tag index.", {}, tag_index.loads),
+        ("app_tag_index_misses_total", "counter", "Tag lookups that were not in the index.", {}, tag_index.misses),
+    ]
+    counters += [
+        ("app_singleflight_requests_total", "counter", "Reads by whether they ran the query or shared one.",
+         {"result": result}, getattr(single_flight, result))
+        for result in ("leaders", "coalesced", "overflow")
+    ]
+    counters += [
+        ("app_read_sessions_total", "counter", "Read sessions by where they were routed.", {"target": target}, count)
+        for target, count in sorted(read_router.routed.items())
+    ]
+    counters += [
+        ("app_read_replica_healthy", "gauge", "Whether the replica passed its last health check.",
+         {"replica": replica.name}, int(replica.healthy))
+        for replica in read_router.replicas
+    ]
+    counters += [
+        ("app_read_replica_in_flight", "gauge", "Sessions currently open on the replica.",
+         {"replica": replica.name}, replica.in_flight)
+        for replica in read_router.replicas
+    ]
+    limiters = {"global": admission.global_limit, **admission.classes}
+    counters += [
+        ("app_admission_in_flight", "gauge", "Requests admitted and running.", {"class": name}, limiter.in_flight)
+        for name, limiter in limiters.items()
+    ]
+    counters += [
+        ("app_admission_queued", "gauge", "Requests waiting for admission.", {"class": name}, limiter.queued)
+        for name, limiter in limiters.items()
+    ]
+    counters += [
+        ("app_admission_shed_total", "counter", "Requests rejected by admission control or rate limits.",
+         {"class": kind, "reason": reason}, count)
+        for (kind, reason), count in sorted(admission.shed.items())
+    ]
+    counters += [
+        ("app_statement_cache_total", "counter", "Compiled statement cache lookups.",
+         {"engine": engine, "result": result}, count)
+        for (engine, result), count in sorted(statement_cache.items())
+    ]
+    counters += [
+        ("app_startup_seconds", "gauge", "Time spent in each startup phase.", {"phase": phase}, seconds)
+        for phase, seconds in startup_timings.items()
+    ]
+    counters += [
+        ("app_query_budget_exceeded_total", "counter", "Requests that exceeded their route's SQL budget.",
+         {"endpoint": endpoint}, count)
+        for endpoint, count in sorted(budget_violations.items())
+    ]
+    return counters
+
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(render(collect()), media_type="text/plain; version=0.0.4")
@@ -1,99 +1,333 @@
-from fastapi import APIRouter, HTTPException
+import json
+from collections import Counter
+from datetime import datetime
+from fastapi import APIRouter, Body, HTTPException, Query, Request, Response
 from fastapi import Depends
-from app.database.database import get_session
+from fastapi.responses import StreamingResponse
+from app.database.database import get_read_session, get_session, read_router
+from app.database.coalescer import run_write
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import select
-from sqlalchemy.orm import selectinload
-from typing import List
-from app.models import Post, User, Tag
+from sqlalchemy.sql import delete, false, insert, select, update
+from typing import Annotated, List, Literal
+from app.models import Post, User
+from app.models.post_tag import post_tag_table
 from app.auth import get_current_user
-from app.schemas.post import BasePost, PostCreate, PostResponse, PostTag, PostUpdate
+from app.counts import adjust_post_counts, forget_post
+from app.metrics import TimedRoute, query_budget
+from app.env import PAGE_MAX_SIZE, POST_BATCH_MAX_SIZE, EXPORT_YIELD_PER
+from app.fieldsets import FieldSet, post_columns, post_fieldset, post_model
+from app.pagination import decode_cursor, set_next_cursor
+from app.projections import post_payloads, tags_by_post
+from app.queries import (
+    POST_BY_ID, POST_COLUMNS, POSTS_PAGE, POSTS_PAGE_AFTER, TAGS_FOR_POSTS, narrowed, tagged_post_ids
+)
+from app.response_cache import Cacheable, response_cache
+from app.responses import encode, model_response
+from app.search import build_search
+from app.singleflight import single_flight
+from app.tag_index import tag_index
+from app.schemas.post import (
+    BasePost, PostBatchError, PostBatchResponse, PostCreate, PostResponse, PostSearchHit, PostTag,
+    PostUpdate
+)
 
 
 router = APIRouter(
     prefix="/posts",
+    route_class=TimedRoute,
     tags=["Posts"]
 )
 
 
 @router.post("/", response_model=None)
+@query_budget(5)
 async def create_post(
     post: PostCreate,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    tags = (await db.execute(select(Tag).filter(Tag.id.in_(post.tags)))).scalars().all()
-    db_post = Post(
-        title=post.title,
-        content=post.content,
-        user_id=current_user.id,
-        tags=tags
-    )
+    tags = await tag_index.resolve(post.tags)
 
-    db.add(db_post)
-    await db.commit()
-    await db.refresh(db_post)
-    return PostResponse(
-        id=db_post.id,
-        title=db_post.title,
-        content=db_post.content,
-        tags=[PostTag(name=tag.name, id=tag.id) for tag in tags]
-    )
+    async def apply(db: AsyncSession):
+        post_id = (await db.execute(
+            insert(Post)
+            .values(title=post.title, content=post.content, user_id=current_user.id)
+            .returning(Post.id)
+        )).scalar_one()
+        if tags:
+            await db.execute(insert(post_tag_table), [{"post_id": post_id, "tag_id": tag_id} for tag_id in tags])
+        await adjust_post_counts(db, Counter({current_user.id: 1}), Counter(tags.keys()))
+        return PostResponse(
+            id=post_id,
+            title=post.title,
+            content=post.content,
+            tags=[PostTag(id=tag_id, name=name) for tag_id, name in tags.items()]
+        )
+
+    response = await run_write(db, apply)
+    response_cache.invalidate("tags", *(f"tag:{tag.id}:{key}" for tag in response.tags for key in ("posts", "count")))
+    return response
+
+
+@router.post("/batch", response_model=PostBatchResponse)
+@query_budget(5)
+async def create_posts_batch(
+    posts: Annotated[List[PostCreate], Body(max_length=POST_BATCH_MAX_SIZE)],
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    tag_names = await tag_index.lookup(tag_id for post in posts for tag_id in post.tags)
+
+    async def apply(db: AsyncSession):
+        valid, errors = [], []
+        for index, post in enumerate(posts):
+            unknown = [tag_id for tag_id in post.tags if tag_id not in tag_names]
+            if unknown:
+                errors.append(PostBatchError(index=index, detail=f"Unknown tag ids: {unknown}"))
+            else:
+                valid.append(post)
+
+        created = []
+        if valid:
+            rows = [{"title": post.title, "content": post.content, "user_id": current_user.id} for post in valid]
+            if db.bind.dialect.name == "sqlite":
+                # SQLite can't return ids in parameter order from a batched
+                # INSERT (SQLAlchemy falls back to one INSERT per row), but it
+                # hands out rowids in row order, so sorting them restores it.
+                post_ids = sorted((await db.scalars(insert(Post).returning(Post.id), rows)).all())
+            else:
+                post_ids = (await db.scalars(insert(Post).returning(Post.id, sort_by_parameter_order=True), rows)).all()
+            links = [
+                {"post_id": post_id, "tag_id": tag_id}
+                for post_id, post in zip(post_ids, valid)
+                for tag_id in dict.fromkeys(post.tags)
+            ]
+            if links:
+                await db.execute(insert(post_tag_table), links)
+            await adjust_post_counts(
+                db, Counter({current_user.id: len(post_ids)}), Counter(link["tag_id"] for link in links))
+            created = [
+                PostResponse(
+                    id=post_id,
+                    title=post.title,
+                    content=post.content,
+                    tags=[PostTag(id=tag_id, name=tag_names[tag_id]) for tag_id in dict.fromkeys(post.tags)]
+                )
+                for post_id, post in zip(post_ids, valid)
+            ]
+        return PostBatchResponse(created=created, errors=errors)
+
+    response = await run_write(db, apply)
+    response_cache.invalidate("tags", *{
+        f"tag:{tag.id}:{key}" for post in response.created for tag in post.tags for key in ("posts", "count")})
+    return response
+
+
+def parse_tag_ids(tags: str) -> list[int]:
+    try:
+        return list(dict.fromkeys(int(tag_id) for tag_id in tags.split(",")))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid tag ids")
+
+
+async def posts_page(query, limit: int, primary: bool, fieldset: FieldSet):
+    async with read_router.session(primary) as db:
+        rows = (await db.execute(*query)).all()
+        headers = {}
+        set_next_cursor(headers, rows, limit, "id")
+        return encode(List[post_model(fieldset)], await post_payloads(db, rows, fieldset.include)), headers
 
 
 @router.get("/", response_model=List[BasePost])
-async def read_posts(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_session)):
-    posts_query = await db.execute(select(Post).options(selectinload(Post.tags)).offset(skip).limit(limit))
-    posts = posts_query.scalars().all()
-    return posts
+@query_budget(3)
+async def read_posts(
+    request: Request,
+    skip: int = 0, limit: Annotated[int, Query(ge=1, le=PAGE_MAX_SIZE)] = 10, cursor: str | None = None,
+    tags: str | None = None, match: Literal["all", "any"] = "all",
+    fieldset: FieldSet = Depends(post_fieldset)
+):
+    primary = read_router.sticky(request)
+    after_id = decode_cursor(cursor, "id")["id"] if cursor is not None else None
+    if after_id is not None:
+        skip = 0
+    tag_ids = list(await tag_index.resolve(parse_tag_ids(tags))) if tags else []
+    columns = post_columns(fieldset)
+    if tag_ids:
+        ids = tagged_post_ids(tag_ids, match, after_id or 0, skip + limit)
+        query = (
+            select(*(getattr(Post, column) for column in columns))
+            .join(ids, ids.c.post_id == Post.id)
+            .order_by(Post.id)
+            .offset(skip)
+            .limit(limit)
+        ), {}
+    elif after_id is not None:
+        query = narrowed(POSTS_PAGE_AFTER, Post, columns), {"after_id": after_id, "limit": limit}
+    else:
+        query = narrowed(POSTS_PAGE, Post, columns), {"skip": skip, "limit": limit}
+
+    if after_id is None and skip == 0:
+        # Everyone lands on the first page: identical concurrent loads of
+        # it share one query, unless a write happened since it started.
+        body, headers = await single_flight.do(
+            ("posts", response_cache.generation, primary, limit, fieldset, tuple(tag_ids), match),
+            lambda: posts_page(query, limit, primary, fieldset)
+        )
+    else:
+        body, headers = await posts_page(query, limit, primary, fieldset)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def export_rows(since: datetime | None, tag: int | None, primary: bool):
+    query = (
+        select(Post.id, Post.title, Post.content, Post.user_id, Post.created_at)
+        .order_by(Post.id)
+        .limit(EXPORT_YIELD_PER)
+    )
+    if since is not None:
+        query = query.filter(Post.created_at >= since)
+    if tag is not None:
+        query = query.filter(Post.id.in_(
+            select(post_tag_table.c.post_id).filter(post_tag_table.c.tag_id == tag)))
+
+    # Read in keyset chunks, each on a session of its own that is closed
+    # before the chunk is sent: a slow download never holds a pooled read
+    # connection, or a WAL snapshot, for longer than one chunk's queries.
+    after_id = 0
+    while True:
+        async with read_router.session(primary) as db:
+            rows = (await db.execute(query.filter(Post.id > after_id))).all()
+            tags = await tags_by_post(db, [row.id for row in rows])
+        for post_id, title, content, user_id, created_at in rows:
+            yield json.dumps({
+                "id": post_id,
+                "title": title,
+                "content": content,
+                "user_id": user_id,
+                "created_at": created_at.isoformat(),
+                "tags": tags.get(post_id, []),
+            }) + "\n"
+        if len(rows) < EXPORT_YIELD_PER:
+            return
+        after_id = rows[-1].id
+
+
+@router.get("/export")
+async def export_posts(request: Request, since: datetime | None = None, tag: int | None = None):
+    if tag is not None:
+        await tag_index.resolve([tag])
+    return StreamingResponse(
+        export_rows(since, tag, read_router.sticky(request)), media_type="application/x-ndjson")
+
+
+@router.get("/search", response_model=List[PostSearchHit])
+@query_budget(3)
+async def search_posts(
+    q: str, tag: int | None = None,
+    skip: int = 0, limit: Annotated[int, Query(ge=1, le=PAGE_MAX_SIZE)] = 10,
+    db: AsyncSession = Depends(get_read_session)
+):
+    if tag is not None:
+        await tag_index.resolve([tag])
+    search = build_search(db.bind.dialect.name, q, tag, skip, limit)
+    if search is None:
+        return []
+    ranks = dict((await db.execute(*search)).all())
+    if not ranks:
+        return []
+    rows = (await db.execute(select(*POST_COLUMNS).filter(Post.id.in_(ranks)))).all()
+    posts = {post["id"]: post for post in await post_payloads(db, rows)}
+    return model_response(
+        List[PostSearchHit],
+        [{**posts[post_id], "rank": rank} for post_id, rank in ranks.items() if post_id in posts]
+    )
 
 
 @router.get("/{post_id}", response_model=BasePost)
-async def read_post(post_id: int, db: AsyncSession = Depends(get_session)):
-    result = await db.execute(select(Post).options(selectinload(Post.tags)).filter(Post.id == post_id))
-    post = result.scalars().first()
-    if post is None:
-        raise HTTPException(status_code=404, detail="Post not found")
-    return post
+@query_budget(3)
+async def read_post(post_id: int, request: Request, fieldset: FieldSet = Depends(post_fieldset)):
+    async def load(db: AsyncSession):
+        statement = narrowed(POST_BY_ID, Post, post_columns(fieldset))
+        rows = (await db.execute(statement, {"post_id": post_id})).all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Post not found")
+        post = (await post_payloads(db, rows, fieldset.include))[0]
+        return Cacheable(post, tags={f"post:{post_id}", *(f"tag:{tag['id']}" for tag in post.get("tags", []))})
+
+    return await response_cache.serve(request, post_model(fieldset), load)
 
 
 @router.put("/{post_id}", response_model=PostResponse)
+@query_budget(6)
 async def update_post(
     post_id: int, post: PostUpdate,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(select(Post).options(selectinload(Post.tags))
-                              .filter(Post.id == post_id, Post.user_id == current_user.id)
-                              )
-    db_post = result.scalars().first()
-    if db_post is None:
-        raise HTTPException(status_code=404, detail="Post not found")
-    tags_query = await db.execute(select(Tag).filter(Tag.id.in_(post.tags)))
-    tags = tags_query.scalars().all()
-    db_post.title = post.title or db_post.title
-    db_post.content = post.content or db_post.content
-    db_post.tags = tags or db_post.tags
-    await db.commit()
-    await db.refresh(db_post)
-    return PostResponse(
-        id=db_post.id,
-        title=db_post.title,
-        content=db_post.content,
-        tags=[PostTag(name=tag.name, id=tag.id) for tag in tags]
+    new_tags = await tag_index.resolve(post.tags) if post.tags else None
+    changes = {field: value for field, value in (("title", post.title), ("content", post.content)) if value}
+
+    async def apply(db: AsyncSession):
+        if changes:
+            statement = (
+                update(Post)
+                .where(Post.id == post_id, Post.user_id == current_user.id, Post.is_deleted == false())
+                .values(**changes)
+                .returning(*POST_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            statement = select(*POST_COLUMNS).filter(Post.id == post_id, Post.user_id == current_user.id)
+        row = (await db.execute(statement)).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Post not found")
+        old_tags = {tag_id: name for _, tag_id, name in await db.execute(TAGS_FOR_POSTS, {"post_ids": [post_id]})}
+        tags = new_tags or old_tags
+        added = [tag_id for tag_id in tags if tag_id not in old_tags]
+        removed = [tag_id for tag_id in old_tags if tag_id not in tags]
+        if removed:
+            await db.execute(delete(post_tag_table).where(
+                post_tag_table.c.post_id == post_id, post_tag_table.c.tag_id.in_(removed)))
+        if added:
+            await db.execute(insert(post_tag_table), [{"post_id": post_id, "tag_id": tag_id} for tag_id in added])
+        changed = Counter(added)
+        changed.subtract(removed)
+        await adjust_post_counts(db, Counter(), changed)
+        return PostResponse(
+            id=row.id,
+            title=row.title,
+            content=row.content,
+            tags=[PostTag(id=tag_id, name=name) for tag_id, name in tags.items()]
+        ), list(changed)
+
+    response, changed = await run_write(db, apply)
+    response_cache.invalidate(
+        f"post:{post_id}",
+        *(f"tag:{tag.id}:posts" for tag in response.tags),
+        *(["tags"] if changed else []),
+        *(f"tag:{tag_id}:count" for tag_id in changed)
     )
+    return response
 
 
 @router.delete("/{post_id}", status_code=204)
+@query_budget(4)
 async def delete_post(
     post_id: int,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    post_query = await db.execute(select(Post).filter(Post.id == post_id, Post.user_id == current_user.id))
-    db_post = post_query.scalars().first()
-    if db_post is None:
-        raise HTTPException(status_code=404, detail="Post not found")
-    await db.delete(db_post)
-    await db.commit()
+    async def apply(db: AsyncSession):
+        result = await db.execute(
+            update(Post)
+            .where(Post.id == post_id, Post.user_id == current_user.id, Post.is_deleted == false())
+            .values(is_deleted=True)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Post not found")
+        return await forget_post(db, post_id, current_user.id)
+
+    tag_ids = await run_write(db, apply)
+    response_cache.invalidate(f"post:{post_id}", "tags", *(f"tag:{tag_id}:count" for tag_id in tag_ids))
     return
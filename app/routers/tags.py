@@ -1,96 +1,192 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi import Depends
 from app.database.database import get_session
+from app.database.coalescer import run_write
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import select
-from sqlalchemy.orm import selectinload
-from typing import List
-from app.models import User, Tag
+from sqlalchemy.sql import false, insert, select, tuple_, update
+from typing import Annotated, List, Literal
+from app.models import User, Tag, Post
+from app.models.post_tag import post_tag_table
 from app.auth import get_current_user
+from app.env import PAGE_MAX_SIZE
+from app.fieldsets import FieldSet, post_columns, post_model, tag_columns, tag_fieldset, tag_model, tag_post_fieldset
+from app.metrics import TimedRoute, query_budget
+from app.pagination import decode_cursor, set_next_cursor
+from app.projections import post_payloads, tag_payloads
+from app.queries import TAG_BY_ID, TAG_COLUMNS, TAG_EXISTS, narrowed
+from app.response_cache import Cacheable, response_cache
+from app.tag_index import bump_tag_version, tag_index
 from app.schemas.tag import TagCreate, TagResponse, BaseTag, TagUpdate, TagPost
 
 
 router = APIRouter(
     prefix="/tags",
+    route_class=TimedRoute,
     tags=["Tags"]
 )
 
 
+async def write_tag(db: AsyncSession, apply):
+    # The only constraint a tag write can break is the live-name index.
+    try:
+        return await run_write(db, apply)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Tag name already exists")
+
+
 @router.post("/", response_model=None)
+@query_budget(3)
 async def create_tag(
     tag: TagCreate,
     db: AsyncSession = Depends(get_session),
     _: User = Depends(get_current_user)
 ):
-    db_tag = Tag(
-        name=tag.name,
-    )
+    async def apply(db: AsyncSession):
+        row = (await db.execute(insert(Tag).values(name=tag.name).returning(*TAG_COLUMNS))).one()
+        return TagResponse(
+            id=row.id,
+            name=row.name,
+            post_count=row.post_count
+        ), await bump_tag_version(db)
 
-    db.add(db_tag)
-    await db.commit()
-    await db.refresh(db_tag)
-    return TagResponse(
-        id=db_tag.id,
-        name=db_tag.name,
-    )
+    response, version = await write_tag(db, apply)
+    tag_index.apply(version, response.id, response.name)
+    response_cache.invalidate("tags")
+    return response
 
 
 @router.get("/", response_model=List[BaseTag])
-async def read_tags(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_session)):
-    tags_query = await db.execute(select(Tag).offset(skip).limit(limit))
-    tags = tags_query.scalars().all()
-    return tags
+@query_budget(1)
+async def read_tags(
+    request: Request,
+    skip: int = 0, limit: Annotated[int, Query(ge=1, le=PAGE_MAX_SIZE)] = 10, cursor: str | None = None,
+    sort: Literal["id", "post_count", "-post_count"] = "id",
+    fieldset: FieldSet = Depends(tag_fieldset)
+):
+    keys = ("id",) if sort == "id" else ("post_count", "id")
+    columns = tuple_(*(getattr(Tag, key) for key in keys))
+
+    async def load(db: AsyncSession):
+        query = select(*(getattr(Tag, column) for column in tag_columns(fieldset, *keys)))
+        if sort == "-post_count":
+            query = query.order_by(Tag.post_count.desc(), Tag.id.desc())
+        else:
+            query = query.order_by(*(getattr(Tag, key) for key in keys))
+        query = query.limit(limit)
+        if cursor is not None:
+            after = decode_cursor(cursor, *keys)
+            position = tuple_(*(after[key] for key in keys))
+            query = query.filter(columns < position if sort == "-post_count" else columns > position)
+        else:
+            query = query.offset(skip)
+        rows = (await db.execute(query)).all()
+        headers = {}
+        set_next_cursor(headers, rows, limit, *keys)
+        return Cacheable(tag_payloads(rows), tags={"tags"}, headers=headers)
+
+    return await response_cache.serve(request, List[tag_model(fieldset)], load)
 
 
 @router.get("/{tag_id}", response_model=BaseTag)
-async def read_tag(tag_id: int, db: AsyncSession = Depends(get_session)):
-    result = await db.execute(select(Tag).filter(Tag.id == tag_id))
-    post = result.scalars().first()
-    if post is None:
-        raise HTTPException(status_code=404, detail="Tag not found")
-    return post
+@query_budget(1)
+async def read_tag(tag_id: int, request: Request, fieldset: FieldSet = Depends(tag_fieldset)):
+    async def load(db: AsyncSession):
+        statement = narrowed(TAG_BY_ID, Tag, tag_columns(fieldset))
+        rows = (await db.execute(statement, {"tag_id": tag_id})).all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Tag not found")
+        return Cacheable(tag_payloads(rows)[0], tags={f"tag:{tag_id}", f"tag:{tag_id}:count"})
+
+    return await response_cache.serve(request, tag_model(fieldset), load)
 
 
 @router.put("/{tag_id}", response_model=TagResponse)
+@query_budget(3)
 async def update_tag(
     tag_id: int, post: TagUpdate,
     db: AsyncSession = Depends(get_session),
     _: User = Depends(get_current_user)
 ):
-    result = await db.execute(select(Tag).filter(Tag.id == tag_id))
-    db_tag = result.scalars().first()
-    if db_tag is None:
-        raise HTTPException(status_code=404, detail="Tag not found")
-    db_tag.name = post.name
-    await db.commit()
-    await db.refresh(db_tag)
-
-    return TagResponse(
-        id=db_tag.id,
-        name=db_tag.name
-    )
+    async def apply(db: AsyncSession):
+        row = (await db.execute(
+            update(Tag)
+            .where(Tag.id == tag_id, Tag.is_deleted == false())
+            .values(name=Tag.name if post.name is None else post.name)
+            .returning(*TAG_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Tag not found")
+        return TagResponse(
+            id=row.id,
+            name=row.name,
+            post_count=row.post_count
+        ), await bump_tag_version(db)
+
+    response, version = await write_tag(db, apply)
+    tag_index.apply(version, response.id, response.name)
+    response_cache.invalidate("tags", f"tag:{tag_id}")
+    return response
 
 
 @router.delete("/{tag_id}", status_code=204)
+@query_budget(3)
 async def delete_tag(
     tag_id: int,
     db: AsyncSession = Depends(get_session),
     _: User = Depends(get_current_user)
 ):
-    tag_query = await db.execute(select(Tag).filter(Tag.id == tag_id))
-    db_tag = tag_query.scalars().first()
-    if db_tag is None:
-        raise HTTPException(status_code=404, detail="Tag not found")
-    await db.delete(db_tag)
-    await db.commit()
+    async def apply(db: AsyncSession):
+        result = await db.execute(
+            update(Tag)
+            .where(Tag.id == tag_id, Tag.is_deleted == false())
+            .values(is_deleted=True)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Tag not found")
+        return await bump_tag_version(db)
+
+    version = await run_write(db, apply)
+    tag_index.apply(version, tag_id, None)
+    response_cache.invalidate("tags", f"tag:{tag_id}")
     return
 
 
 @router.get("/{tag_id}/posts", response_model=List[TagPost])
-async def read_tag_post(tag_id, db: AsyncSession = Depends(get_session)):
-    tag_query = await db.execute(select(Tag).options(selectinload(Tag.posts)).filter(Tag.id == tag_id))
-    tag = tag_query.scalars().first()
-    if tag is None:
-        raise HTTPException(status_code=404, detail="Tag not found")
-
-    return tag.posts
+@query_budget(4)
+async def read_tag_post(
+    tag_id: int, request: Request,
+    limit: Annotated[int, Query(ge=1, le=PAGE_MAX_SIZE)] = 10, cursor: str | None = None,
+    fieldset: FieldSet = Depends(tag_post_fieldset)
+):
+    async def load(db: AsyncSession):
+        tag_query = await db.execute(TAG_EXISTS, {"tag_id": tag_id})
+        if tag_query.first() is None:
+            raise HTTPException(status_code=404, detail="Tag not found")
+
+        query = (
+            select(*(getattr(Post, column) for column in post_columns(fieldset)))
+            .join(post_tag_table, post_tag_table.c.post_id == Post.id)
+            .filter(post_tag_table.c.tag_id == tag_id)
+            .order_by(post_tag_table.c.post_id)
+            .limit(limit)
+        )
+        if cursor is not None:
+            query = query.filter(post_tag_table.c.post_id > decode_cursor(cursor, "id")["id"])
+        rows = (await db.execute(query)).all()
+        headers = {}
+        set_next_cursor(headers, rows, limit, "id")
+        posts = await post_payloads(db, rows, fieldset.include)
+        return Cacheable(
+            posts,
+            tags={
+                f"tag:{tag_id}", f"tag:{tag_id}:posts",
+                *(f"post:{post['id']}" for post in posts),
+                *(f"tag:{tag['id']}" for post in posts for tag in post.get("tags", []))
+            },
+            headers=headers
+        )
+
+    return await response_cache.serve(request, List[post_model(fieldset)], load)
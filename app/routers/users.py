@@ -4,36 +4,31 @@ from pydantic import BaseModel, EmailStr
 
 
 import jwt
-from passlib.context import CryptContext
 
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import insert
 from app.database import get_session
+from app.database.coalescer import run_write
 from app.models import User
 from app.env import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 from app.auth import get_user
+from app.hashing import get_password_hash, verify_password
+from app.metrics import TimedRoute, query_budget
 from app.schemas.user import BaseUser, Token, UserCreate, UserLogin
 
 
-router = APIRouter()
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+router = APIRouter(route_class=TimedRoute)
 
 
 async def authenticate_user(db: Session, username: str, password: str):
     user = await get_user(db, username)
     if not user:
         return False
-    if not verify_password(password, user.password):
+    # Hand the pooled connection back before bcrypt runs, so queued logins
+    # cannot starve unrelated requests of database connections.
+    await db.close()
+    if not await verify_password(password, user.password):
         return False
     return user
 
@@ -50,6 +45,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
 
 @router.post("/signup", response_model=BaseUser)
+@query_budget(2)
 async def signup(user: UserCreate, db: AsyncSession = Depends(get_session)):
     db_user = await get_user(db, user.username)
     if db_user:
@@ -57,19 +53,22 @@ async def signup(user: UserCreate, db: AsyncSession = Depends(get_session)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        password=hashed_password
-    )
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
-    return db_user
+    await db.close()
+    hashed_password = await get_password_hash(user.password)
+
+    async def apply(db: AsyncSession):
+        row = (await db.execute(
+            insert(User)
+            .values(username=user.username, email=user.email, password=hashed_password)
+            .returning(User.username, User.email, User.post_count)
+        )).one()
+        return BaseUser(username=row.username, email=row.email, post_count=row.post_count)
+
+    return await run_write(db, apply)
 
 
 @router.post("/login")
+@query_budget(1)
 async def login_for_access_token(
     user: UserLogin,
     db: AsyncSession = Depends(get_session),
@@ -8,6 +8,11 @@ class PostTag(BaseModel):
     name: str
 
 
+class PostAuthor(BaseModel):
+    id: int
+    username: str
+
+
 class BasePost(BaseModel):
     title: str
     content: str
@@ -29,3 +34,18 @@ class PostUpdate(BaseModel):
     title: str | None
     content: str | None
     tags: List[int] | None
+
+
+class PostBatchError(BaseModel):
+    index: int
+    detail: str
+
+
+class PostBatchResponse(BaseModel):
+    created: List[PostResponse]
+    errors: List[PostBatchError]
+
+
+class PostSearchHit(BasePost):
+    id: int
+    rank: float
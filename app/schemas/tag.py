@@ -3,6 +3,7 @@ from pydantic import BaseModel
 
 class BaseTag(BaseModel):
     name: str
+    post_count: int = 0
 
 
 class TagResponse(BaseTag):
@@ -9,6 +9,7 @@ class Token(BaseModel):
 class BaseUser(BaseModel):
     username: str
     email: str
+    post_count: int = 0
 
 
 class UserInDB(BaseUser):
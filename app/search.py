@@ -0,0 +1,125 @@
+import asyncio
+import re
+import sys
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts
+    USING fts5(title, content, content='posts', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, content ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+
+# What ensure_search_index adds outside the models, by object type, for
+# Alembic's autogenerate to leave alone.
+SEARCH_OBJECTS = {
+    "table": lambda name: name.startswith("posts_fts"),
+    "column": lambda name: name == "search_vector",
+    "index": lambda name: name == "ix_posts_search_vector",
+}
+
+
+def is_search_object(name: str, type_: str) -> bool:
+    matches = SEARCH_OBJECTS.get(type_)
+    return matches is not None and matches(name)
+
+
+SQLITE_SEARCH = """
+    SELECT posts_fts.rowid AS id, -bm25(posts_fts, 10.0, 1.0) AS rank
+    FROM posts_fts JOIN posts ON posts.id = posts_fts.rowid
+    WHERE posts_fts MATCH :q AND posts.is_deleted = 0 {tag_filter}
+    ORDER BY bm25(posts_fts, 10.0, 1.0)
+    LIMIT :limit OFFSET :skip
+"""
+
+POSTGRES_SEARCH = """
+    SELECT posts.id AS id, ts_rank(posts.search_vector, query) AS rank
+    FROM posts, websearch_to_tsquery('english', :q) AS query
+    WHERE posts.search_vector @@ query AND posts.is_deleted = false {tag_filter}
+    ORDER BY rank DESC, posts.id
+    LIMIT :limit OFFSET :skip
+"""
+
+TAG_FILTER = "AND posts.id IN (SELECT post_id FROM post_tag WHERE tag_id = :tag)"
+
+
+def ddl_for(dialect_name: str) -> list:
+    if dialect_name == "sqlite":
+        return SQLITE_DDL
+    if dialect_name == "postgresql":
+        return POSTGRES_DDL
+    return []
+
+
+async def ensure_search_index(conn):
+    for statement in ddl_for(conn.dialect.name):
+        await conn.execute(text(statement))
+
+
+def build_search(dialect_name: str, q: str, tag: int | None, skip: int, limit: int):
+    params = {"skip": skip, "limit": limit}
+    if dialect_name == "sqlite":
+        # Quote every word so user input is never parsed as FTS5 syntax.
+        terms = re.findall(r"\w+", q)
+        if not terms:
+            return None
+        params["q"] = " ".join(f'"{term}"' for term in terms)
+        sql = SQLITE_SEARCH
+    elif dialect_name == "postgresql":
+        params["q"] = q
+        sql = POSTGRES_SEARCH
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Full-text search is not supported on {dialect_name}"
+        )
+    if tag is not None:
+        params["tag"] = tag
+    return text(sql.format(tag_filter=TAG_FILTER if tag is not None else "")), params
+
+
+async def rebuild_search_index():
+    from app.database.database import engine
+
+    async with engine.begin() as conn:
+        await ensure_search_index(conn)
+        if conn.dialect.name == "sqlite":
+            await conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+        elif conn.dialect.name == "postgresql":
+            await conn.execute(text("REINDEX INDEX ix_posts_search_vector"))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m app.search rebuild")
+    asyncio.run(rebuild_search_index())
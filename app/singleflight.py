@@ -0,0 +1,56 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from app.env import SINGLEFLIGHT_MAX_WAITERS
+
+
+T = TypeVar("T")
+
+
+class Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution of the first
+    # caller's function, and its result or exception. The shared task is
+    # shielded, so a caller that goes away doesn't cancel it for the others;
+    # it therefore must not depend on resources owned by a single request.
+    def __init__(self, max_waiters: int):
+        self.max_waiters = max_waiters
+        self.leaders = 0
+        self.coalesced = 0
+        self.overflow = 0
+        self._flights: dict[Hashable, Flight] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is not None:
+            if flight.waiters < self.max_waiters:
+                flight.waiters += 1
+                self.coalesced += 1
+                return await asyncio.shield(flight.task)
+            # Too many already waiting on this one: run separately.
+            self.overflow += 1
+            return await fn()
+
+        task = asyncio.ensure_future(fn())
+        flight = self._flights[key] = Flight(task)
+        task.add_done_callback(lambda _: self._land(key, flight))
+        self.leaders += 1
+        return await asyncio.shield(task)
+
+    def _land(self, key: Hashable, flight: Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception as retrieved even if every caller went away.
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def __len__(self):
+        return len(self._flights)
+
+
+single_flight = SingleFlight(SINGLEFLIGHT_MAX_WAITERS)
@@ -0,0 +1,81 @@
+import logging
+import time
+from pathlib import Path
+
+from alembic.script import ScriptDirectory
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.sql import text
+
+from app.auth import get_user
+from app.database.database import ReadSessionLocal, SessionLocal, engine, init_db, read_router
+from app.env import STARTUP_MODE, STARTUP_PREWARM
+from app.fieldsets import DEFAULT_POST, DEFAULT_TAG, post_columns, tag_columns
+from app.models import Post, Tag
+from app.projections import tags_by_post
+from app.queries import POST_BY_ID, POSTS_PAGE, POSTS_PAGE_AFTER, TAG_BY_ID, TAG_EXISTS, narrowed
+from app.tag_index import tag_index
+
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+
+# Seconds spent in each phase of the last startup, exported on /metrics.
+startup_timings: dict[str, float] = {}
+
+
+class SchemaMismatch(RuntimeError):
+    pass
+
+
+async def check_schema():
+    heads = set(ScriptDirectory(str(ALEMBIC_DIR)).get_heads())
+    try:
+        async with engine.connect() as conn:
+            current = set((await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars())
+    except DBAPIError as exc:
+        raise SchemaMismatch("Database is not under Alembic control; run `alembic upgrade head`") from exc
+    if current != heads:
+        raise SchemaMismatch(
+            f"Database is at revision {sorted(current)}, code expects {sorted(heads)}; run `alembic upgrade head`")
+
+
+async def warm_statements():
+    # Run the hot read statements once per engine, in the shapes the default
+    # responses execute them, so their compiled forms are cached before the
+    # first request rather than during it.
+    post_shape, tag_shape = post_columns(DEFAULT_POST), tag_columns(DEFAULT_TAG)
+    healthy = [replica.sessions for replica in read_router.replicas if replica.healthy]
+    for session_factory in (SessionLocal, ReadSessionLocal, *healthy):
+        async with session_factory() as db:
+            await get_user(db, "")
+            await tags_by_post(db, [0])
+            await db.execute(narrowed(POSTS_PAGE, Post, post_shape), {"skip": 0, "limit": 1})
+            await db.execute(narrowed(POSTS_PAGE_AFTER, Post, post_shape), {"after_id": 0, "limit": 1})
+            await db.execute(narrowed(POST_BY_ID, Post, post_shape), {"post_id": 0})
+            await db.execute(narrowed(TAG_BY_ID, Tag, tag_shape), {"tag_id": 0})
+            await db.execute(TAG_EXISTS, {"tag_id": 0})
+
+
+async def configure_models():
+    configure_mappers()
+
+
+async def startup():
+    phases = [("schema", check_schema if STARTUP_MODE == "check" else init_db)]
+    if read_router.replicas:
+        phases.append(("replicas", read_router.check))
+    if STARTUP_PREWARM:
+        phases += [("mappers", configure_models), ("statements", warm_statements)]
+    phases.append(("tag_index", tag_index.load))
+
+    startup_timings.clear()
+    for name, run in phases:
+        started = time.perf_counter()
+        await run()
+        startup_timings[name] = time.perf_counter() - started
+    logger.info(
+        "Startup (%s) took %.1f ms: %s", STARTUP_MODE, sum(startup_timings.values()) * 1000,
+        ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in startup_timings.items())
+    )
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import Iterable
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import select, update
+
+from app.database.database import ReadSessionLocal
+from app.env import TAG_INDEX_REFRESH_SECONDS
+from app.metrics import untimed
+from app.models import Tag, tag_version_table
+
+
+logger = logging.getLogger(__name__)
+
+
+async def bump_tag_version(db: AsyncSession) -> int:
+    result = await db.execute(
+        update(tag_version_table)
+        .where(tag_version_table.c.id == 1)
+        .values(version=tag_version_table.c.version + 1)
+        .returning(tag_version_table.c.version)
+    )
+    return result.scalar_one()
+
+
+class TagIndex:
+    # Process-local id -> name map of live tags. Local tag writes are applied
+    # after commit; writes from other workers are picked up through the
+    # tag_version counter, polled in the background and re-read on a miss.
+    def __init__(self):
+        self.names: dict[int, str] = {}
+        self.version = None
+        self.loads = 0
+        self.misses = 0
+        self._lock = asyncio.Lock()
+
+    async def load(self):
+        async with self._lock:
+            await self._load()
+
+    async def _load(self):
+        with untimed():
+            async with ReadSessionLocal() as db:
+                version = (await db.execute(select(tag_version_table.c.version))).scalar()
+                names = dict((await db.execute(select(Tag.id, Tag.name))).all())
+        self.names, self.version = names, version
+        self.loads += 1
+
+    @staticmethod
+    async def current_version() -> int:
+        async with ReadSessionLocal() as db:
+            return (await db.execute(select(tag_version_table.c.version))).scalar()
+
+    async def refresh(self):
+        if await self.current_version() != self.version:
+            await self.load()
+
+    async def refresh_forever(self, interval_seconds: float = TAG_INDEX_REFRESH_SECONDS):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Tag index refresh failed")
+
+    async def lookup(self, tag_ids: Iterable[int]) -> dict[int, str]:
+        tag_ids = set(tag_ids)
+        if not tag_ids <= self.names.keys():
+            # Possibly created by another worker since the last refresh; if
+            # the tag set hasn't changed since, they just don't exist.
+            self.misses += 1
+            async with self._lock:
+                if not tag_ids <= self.names.keys():
+                    with untimed():
+                        changed = await self.current_version() != self.version
+                    if changed:
+                        await self._load()
+        return {tag_id: self.names[tag_id] for tag_id in tag_ids if tag_id in self.names}
+
+    async def resolve(self, tag_ids: Iterable[int]) -> dict[int, str]:
+        tag_ids = list(dict.fromkeys(tag_ids))
+        names = await self.lookup(tag_ids)
+        unknown = [tag_id for tag_id in tag_ids if tag_id not in names]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown tag ids: {unknown}"
+            )
+        return {tag_id: names[tag_id] for tag_id in tag_ids}
+
+    def apply(self, version: int, tag_id: int, name: str | None):
+        if name is None:
+            self.names.pop(tag_id, None)
+        else:
+            self.names[tag_id] = name
+        # Anything but the next version means another worker wrote in
+        # between; leave the version behind so the next refresh reloads.
+        if self.version is not None and version == self.version + 1:
+            self.version = version
+
+
+tag_index = TagIndex()
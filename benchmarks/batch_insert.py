@@ -0,0 +1,65 @@
+"""Rows/second of POST /posts/ one at a time versus POST /posts/batch.
+
+    python -m benchmarks.batch_insert --posts 500 --batch-size 250
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import login, scratch_database
+
+
+async def run(args):
+    import httpx
+    from app.main import app, lifespan
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            headers = await login(client)
+            tag_ids = []
+            for index in range(args.tags):
+                response = await client.post("/tags/", json={"name": f"tag-{index}"}, headers=headers)
+                tag_ids.append(response.json()["id"])
+            payloads = [
+                {
+                    "title": f"post {index}",
+                    "content": "lorem ipsum " * 20,
+                    "tags": [tag_ids[index % len(tag_ids)], tag_ids[(index + 1) % len(tag_ids)]],
+                }
+                for index in range(args.posts)
+            ]
+
+            started = time.perf_counter()
+            for payload in payloads:
+                (await client.post("/posts/", json=payload, headers=headers)).raise_for_status()
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for offset in range(0, len(payloads), args.batch_size):
+                chunk = payloads[offset:offset + args.batch_size]
+                (await client.post("/posts/batch", json=chunk, headers=headers)).raise_for_status()
+            batch = time.perf_counter() - started
+
+    return {
+        "posts": args.posts,
+        "single_rows_per_sec": round(args.posts / single, 1),
+        "batch_rows_per_sec": round(args.posts / batch, 1),
+        "speedup": round(single / batch, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--tags", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=250)
+    args = parser.parse_args()
+
+    with scratch_database():
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summary(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+@contextmanager
+def scratch_database():
+    # Must run before anything under app/ is imported: app.env reads these
+    # once at import time.
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        os.environ.setdefault("SECRET_KEY", "bench-secret")
+        os.environ.setdefault("ALGORITHM", "HS256")
+        os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+        yield tmp
+
+
+async def login(client, username="bench", password="bench-password"):
+    credentials = {"username": username, "password": password}
+    await client.post("/signup", json={**credentials, "email": f"{username}@example.com"})
+    response = await client.post("/login", json=credentials)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
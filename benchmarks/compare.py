@@ -0,0 +1,41 @@
+"""Compare two benchmarks.run reports endpoint by endpoint.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms"]
+
+
+def change(before, after) -> str:
+    if not before or after is None:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as before_file, open(args.after) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+
+    rows = [("endpoint", "metric", "before", "after", "change")]
+    rows.append(("total", "throughput_rps", before["total"]["throughput_rps"], after["total"]["throughput_rps"],
+                 change(before["total"]["throughput_rps"], after["total"]["throughput_rps"])))
+    for name in sorted(set(before["endpoints"]) | set(after["endpoints"])):
+        old, new = before["endpoints"].get(name, {}), after["endpoints"].get(name, {})
+        for metric in METRICS:
+            rows.append((name, metric, old.get(metric), new.get(metric), change(old.get(metric), new.get(metric))))
+
+    widths = [max(len(str(row[column])) for row in rows) for column in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""CPU per lookup: statements built per call versus the prebuilt ones in app.queries.
+
+Models auth-heavy traffic, where every request misses the principal cache
+and resolves its user by username, alongside single-post reads:
+
+    python -m benchmarks.hot_queries --users 1000 --lookups 5000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.common import scratch_database
+
+
+def built_per_call():
+    from sqlalchemy.sql import select
+    from app.models import Post, User
+    from app.queries import POST_COLUMNS
+
+    async def user(db, username):
+        return (await db.execute(select(User).filter(User.username == username))).scalars().first()
+
+    async def post(db, post_id):
+        return (await db.execute(select(*POST_COLUMNS).filter(Post.id == post_id))).first()
+
+    return user, post
+
+
+def prebuilt():
+    from app.queries import POST_BY_ID, USER_BY_USERNAME
+
+    async def user(db, username):
+        return (await db.execute(USER_BY_USERNAME, {"username": username})).scalars().first()
+
+    async def post(db, post_id):
+        return (await db.execute(POST_BY_ID, {"post_id": post_id})).first()
+
+    return user, post
+
+
+async def measure(lookups, args) -> dict:
+    from app.database.database import ReadSessionLocal
+
+    user, post = lookups
+    rng = random.Random(0)
+    results = {}
+    for name, lookup, keys in [
+        ("get_user", user, [f"user{rng.randint(1, args.users)}" for _ in range(args.lookups)]),
+        ("read_post", post, [rng.randint(1, args.posts) for _ in range(args.lookups)]),
+    ]:
+        started, started_cpu = time.perf_counter(), time.process_time()
+        for key in keys:
+            # One session per lookup, as a request would have.
+            async with ReadSessionLocal() as db:
+                assert await lookup(db, key) is not None
+        results[name] = {
+            "cpu_us_per_lookup": round((time.process_time() - started_cpu) / len(keys) * 1e6, 1),
+            "wall_us_per_lookup": round((time.perf_counter() - started) / len(keys) * 1e6, 1),
+        }
+    return results
+
+
+async def run(args):
+    from benchmarks.seed import seed
+    from app.metrics import statement_cache
+
+    await seed(users=args.users, posts=args.posts, tags=10)
+    variants = {"built_per_call": built_per_call(), "prebuilt": prebuilt()}
+    for lookups in variants.values():
+        await measure(lookups, argparse.Namespace(**{**vars(args), "lookups": 200}))
+    statement_cache.clear()
+    results = {name: await measure(lookups, args) for name, lookups in variants.items()}
+    for lookup in ("get_user", "read_post"):
+        before = results["built_per_call"][lookup]["cpu_us_per_lookup"]
+        results[f"{lookup}_cpu_reduction"] = round(1 - results["prebuilt"][lookup]["cpu_us_per_lookup"] / before, 3)
+    results["statement_cache"] = {f"{engine}:{result}": count for (engine, result), count in statement_cache.items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+
+    with scratch_database():
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
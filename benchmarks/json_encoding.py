@@ -0,0 +1,79 @@
+"""Bytes/second of response encoding for pages of posts.
+
+Compares FastAPI's default path (validate, serialise to Python, stdlib
+json), the same path with FastJSONResponse, and the single-pass encoder
+used by the list endpoints:
+
+    python -m benchmarks.json_encoding --sizes 10 100 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+from benchmarks.common import scratch_database
+
+
+def page(size: int) -> list:
+    return [
+        {
+            "id": index,
+            "title": f"post {index}",
+            "content": "lorem ipsum dolor sit amet " * 8,
+            "tags": [{"id": tag_id, "name": f"tag{tag_id}"} for tag_id in range(index % 5, index % 5 + 3)],
+        }
+        for index in range(size)
+    ]
+
+
+def encoders() -> dict:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from app.responses import FastJSONResponse, encode
+    from app.schemas.post import BasePost
+
+    field = create_model_field("Response_read_posts", List[BasePost], mode="serialization")
+
+    async def fastapi_default(content):
+        return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+    async def fast_response_class(content):
+        return FastJSONResponse(await serialize_response(field=field, response_content=content)).body
+
+    async def single_pass(content):
+        return encode(List[BasePost], content)
+
+    return {"fastapi_default": fastapi_default, "fast_response_class": fast_response_class, "single_pass": single_pass}
+
+
+async def measure(encoder, content, seconds: float) -> dict:
+    size = len(await encoder(content))
+    rounds, started = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        await encoder(content)
+        rounds += 1
+    return {"mb_per_sec": round(size * rounds / elapsed / 1e6, 1), "us_per_page": round(elapsed / rounds * 1e6, 1)}
+
+
+async def run(args):
+    results = {}
+    for size in args.sizes:
+        content = page(size)
+        results[size] = {name: await measure(encoder, content, args.seconds) for name, encoder in encoders().items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with scratch_database():
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Latency of an unrelated read endpoint during a burst of logins.
+
+Runs the app in-process against a throwaway SQLite database:
+
+    python -m benchmarks.login_storm --logins 200 --probes 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import scratch_database, summary
+
+
+async def probe(client, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await client.get("/tags/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(args):
+    import httpx
+    from app.main import app, lifespan
+
+    credentials = {"username": "bench", "password": "bench-password"}
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/signup", json={**credentials, "email": "bench@example.com"})
+            idle = await probe(client, args.probes)
+
+            logins = asyncio.gather(*(
+                client.post("/login", json=credentials) for _ in range(args.logins)
+            ))
+            storm = await probe(client, args.probes)
+            statuses = [response.status_code for response in await logins]
+
+    return {
+        "idle": summary(idle),
+        "login_storm": summary(storm),
+        "logins": {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+
+    with scratch_database():
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""CPU and memory per page of posts: ORM hydration versus column projection.
+
+Loads the same keyset pages both ways and encodes them the way the API
+does (validate against List[BasePost], dump to JSON):
+
+    python -m benchmarks.read_path --posts 20000 --page-size 100 --pages 100
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import List
+
+from benchmarks.common import scratch_database, summary
+
+
+async def orm_page(db, after_id: int, page_size: int):
+    from sqlalchemy.orm import selectinload
+    from sqlalchemy.sql import select
+    from app.models import Post
+
+    query = (
+        select(Post).options(selectinload(Post.tags))
+        .filter(Post.id > after_id).order_by(Post.id).limit(page_size)
+    )
+    return (await db.execute(query)).scalars().all()
+
+
+async def projection_page(db, after_id: int, page_size: int):
+    from sqlalchemy.sql import select
+    from app.models import Post
+    from app.projections import post_payloads
+    from app.queries import POST_COLUMNS
+
+    query = select(*POST_COLUMNS).filter(Post.id > after_id).order_by(Post.id).limit(page_size)
+    return await post_payloads(db, (await db.execute(query)).all())
+
+
+async def measure(load, args) -> dict:
+    from app.database.database import ReadSessionLocal
+    from app.responses import adapter_for
+    from app.schemas.post import BasePost
+
+    adapter = adapter_for(List[BasePost])
+    starts = [(page * args.page_size) % max(args.posts - args.page_size, 1) for page in range(args.pages)]
+    cpu, wall, peaks = [], [], []
+    tracemalloc.start()
+    for after_id in starts:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started, started_cpu = time.perf_counter(), time.process_time()
+        async with ReadSessionLocal() as db:
+            page = await load(db, after_id, args.page_size)
+            adapter.dump_json(adapter.validate_python(page, from_attributes=True))
+        cpu.append(time.process_time() - started_cpu)
+        wall.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return {
+        **summary(wall),
+        "cpu_ms_per_page": round(sum(cpu) / len(cpu) * 1000, 3),
+        "peak_kib_per_page": round(sum(peaks) / len(peaks) / 1024, 1),
+    }
+
+
+async def run(args):
+    from benchmarks.seed import seed
+
+    await seed(users=args.users, posts=args.posts, tags=args.tags)
+    variants = {"orm": orm_page, "projection": projection_page}
+    # Warm both paths (statement caches, adapters) before measuring.
+    for load in variants.values():
+        await measure(load, argparse.Namespace(**{**vars(args), "pages": 5}))
+    results = {name: await measure(load, args) for name, load in variants.items()}
+    results["cpu_reduction"] = round(1 - results["projection"]["cpu_ms_per_page"] / results["orm"]["cpu_ms_per_page"], 3)
+    results["memory_reduction"] = round(
+        1 - results["projection"]["peak_kib_per_page"] / results["orm"]["peak_kib_per_page"], 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+
+    with scratch_database():
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
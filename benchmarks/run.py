@@ -0,0 +1,174 @@
+"""Load test the API against a freshly seeded SQLite database.
+
+Drives app.main.app in-process through httpx, or a real uvicorn worker,
+and writes per-endpoint latency percentiles plus throughput as JSON:
+
+    python -m benchmarks.run --scenario mixed --concurrency 32 --requests 5000 --output after.json
+    python -m benchmarks.run --mode uvicorn --scenario read
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from benchmarks.common import scratch_database, summary
+from benchmarks.scenarios import SCENARIOS, Context, build_request
+from benchmarks.seed import seed
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def plan_requests(args, ctx: Context, count: int, rng: random.Random) -> list:
+    weights = SCENARIOS[args.scenario]
+    names = rng.choices(list(weights), list(weights.values()), k=count)
+    return [(name, *build_request(name, rng, ctx)) for name in names]
+
+
+async def drive(client, requests: list, concurrency: int):
+    samples = defaultdict(list)
+    statuses = defaultdict(Counter)
+    pending = iter(requests)
+
+    async def worker():
+        for name, method, url, kwargs in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = str(response.status_code)
+            except Exception as exc:
+                status = type(exc).__name__
+            samples[name].append(time.perf_counter() - started)
+            statuses[name][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, samples, statuses
+
+
+async def run_load(client, args, ctx: Context) -> dict:
+    rng = random.Random(args.seed)
+    await drive(client, plan_requests(args, ctx, args.warmup, rng), args.concurrency)
+    elapsed, samples, statuses = await drive(
+        client, plan_requests(args, ctx, args.requests, rng), args.concurrency)
+    total = sum(len(values) for values in samples.values())
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        "total": {
+            "requests": total,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(total / elapsed, 1),
+            **summary([value for values in samples.values() for value in values]),
+        },
+        "endpoints": {
+            name: {**summary(samples[name]), "statuses": dict(statuses[name])}
+            for name in sorted(samples)
+        },
+    }
+
+
+async def prepare(args) -> Context:
+    from app.database.database import engine
+    from app.routers.users import create_access_token
+
+    await seed(args.users, args.posts, args.tags, seed=args.seed)
+    await engine.dispose()
+    tokens = [create_access_token({"sub": f"user{index}"}) for index in range(1, args.users + 1)]
+    return Context(args.users, args.posts, args.tags, tokens)
+
+
+async def run_in_process(args) -> dict:
+    import httpx
+    from app.main import app, lifespan
+
+    ctx = await prepare(args)
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await run_load(client, args, ctx)
+
+
+async def wait_until_ready(client, process, deadline: float):
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            await client.get("/tags/")
+            return
+        except Exception:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("uvicorn did not start in time")
+
+
+async def run_uvicorn(args) -> dict:
+    import httpx
+
+    ctx = await prepare(args)
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None) as client:
+            await wait_until_ready(client, process, time.monotonic() + 30)
+            return await run_load(client, args, ctx)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--posts", type=int, default=10000)
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with scratch_database():
+        runner = run_uvicorn if args.mode == "uvicorn" else run_in_process
+        report = json.dumps(asyncio.run(runner(args)), indent=2)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
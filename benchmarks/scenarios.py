@@ -0,0 +1,67 @@
+import random
+
+from benchmarks.seed import PASSWORD, WORDS, owner_of
+
+
+# Relative weights of each operation per scenario.
+SCENARIOS = {
+    "read": {
+        "read_posts": 4, "read_posts_cursor": 2, "read_post": 6,
+        "read_tags": 1, "read_tag": 1, "read_tag_posts": 2, "search_posts": 1,
+    },
+    "write": {"create_post": 6, "update_post": 3, "delete_post": 1, "create_tag": 1},
+    "login": {"login": 1},
+    "mixed": {
+        "read_posts": 4, "read_post": 6, "read_tags": 1, "read_tag_posts": 2, "search_posts": 1,
+        "create_post": 2, "update_post": 1, "login": 0.2,
+    },
+}
+
+
+class Context:
+    def __init__(self, users: int, posts: int, tags: int, tokens: list):
+        self.users = users
+        self.posts = posts
+        self.tags = tags
+        self.tokens = tokens
+
+    def auth(self, user_id: int) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[user_id - 1]}"}
+
+
+def build_request(name: str, rng: random.Random, ctx: Context):
+    post_id = rng.randint(1, ctx.posts)
+    tag_id = rng.randint(1, ctx.tags)
+    if name == "read_posts":
+        return "GET", "/posts/", {"params": {"skip": rng.randrange(ctx.posts), "limit": 10}}
+    if name == "read_posts_cursor":
+        from app.pagination import encode_cursor
+        return "GET", "/posts/", {"params": {"cursor": encode_cursor(id=rng.randrange(ctx.posts)), "limit": 10}}
+    if name == "read_post":
+        return "GET", f"/posts/{post_id}", {}
+    if name == "read_tags":
+        return "GET", "/tags/", {"params": {"skip": rng.randrange(ctx.tags), "limit": 10}}
+    if name == "read_tag":
+        return "GET", f"/tags/{tag_id}", {}
+    if name == "read_tag_posts":
+        return "GET", f"/tags/{tag_id}/posts", {"params": {"limit": 20}}
+    if name == "search_posts":
+        return "GET", "/posts/search", {"params": {"q": rng.choice(WORDS)}}
+    if name == "create_post":
+        payload = {
+            "title": "bench",
+            "content": " ".join(rng.choice(WORDS) for _ in range(40)),
+            "tags": rng.sample(range(1, ctx.tags + 1), min(2, ctx.tags)),
+        }
+        return "POST", "/posts/", {"json": payload, "headers": ctx.auth(rng.randint(1, ctx.users))}
+    if name == "update_post":
+        payload = {"title": "updated", "content": None, "tags": [tag_id]}
+        return "PUT", f"/posts/{post_id}", {"json": payload, "headers": ctx.auth(owner_of(post_id, ctx.users))}
+    if name == "delete_post":
+        return "DELETE", f"/posts/{post_id}", {"headers": ctx.auth(owner_of(post_id, ctx.users))}
+    if name == "create_tag":
+        return "POST", "/tags/", {"json": {"name": f"bench-{rng.getrandbits(64):x}"}, "headers": ctx.auth(1)}
+    if name == "login":
+        payload = {"username": f"user{rng.randint(1, ctx.users)}", "password": PASSWORD}
+        return "POST", "/login", {"json": payload}
+    raise ValueError(f"Unknown operation {name}")
@@ -0,0 +1,57 @@
+import random
+
+from sqlalchemy.sql import insert
+
+
+PASSWORD = "bench-password"
+CHUNK = 5000
+
+
+def owner_of(post_id: int, users: int) -> int:
+    return (post_id - 1) % users + 1
+
+
+async def seed(users: int, posts: int, tags: int, tags_per_post: int = 3, seed: int = 0):
+    from app.counts import reconcile_post_counts
+    from app.database.database import engine, init_db
+    from app.hashing import pwd_context
+    from app.models import Post, Tag, User
+    from app.models.post_tag import post_tag_table
+
+    await init_db()
+    rng = random.Random(seed)
+    # One bcrypt hash shared by every user: hashing per user would dominate
+    # seeding time for large volumes.
+    password = pwd_context.hash(PASSWORD)
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {"id": index, "username": f"user{index}", "email": f"user{index}@example.com", "password": password}
+            for index in range(1, users + 1)
+        ])
+        await conn.execute(insert(Tag), [{"id": index, "name": f"tag{index}"} for index in range(1, tags + 1)])
+        for offset in range(1, posts + 1, CHUNK):
+            post_ids = range(offset, min(offset + CHUNK, posts + 1))
+            await conn.execute(insert(Post), [
+                {
+                    "id": post_id,
+                    "title": f"post {post_id}",
+                    "content": " ".join(rng.choice(WORDS) for _ in range(40)),
+                    "user_id": owner_of(post_id, users),
+                }
+                for post_id in post_ids
+            ])
+            links = [
+                {"post_id": post_id, "tag_id": tag_id}
+                for post_id in post_ids
+                for tag_id in rng.sample(range(1, tags + 1), min(tags_per_post, tags))
+            ]
+            if links:
+                await conn.execute(insert(post_tag_table), links)
+    # Rows were inserted behind the write paths that maintain post_count.
+    await reconcile_post_counts()
+
+
+WORDS = (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike "
+    "november oscar papa quebec romeo sierra tango uniform victor whiskey xray yankee zulu"
+).split()
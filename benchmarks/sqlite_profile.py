@@ -0,0 +1,86 @@
+"""Mixed read/write throughput for each SQLITE_PROFILE.
+
+Each profile runs in its own interpreter, since the engine is configured
+from the environment at import time:
+
+    python -m benchmarks.sqlite_profile --workers 32 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.common import login, scratch_database, summary
+
+
+PROFILES = ["default", "performance"]
+
+
+async def run(args):
+    import httpx
+    from app.main import app, lifespan
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            headers = await login(client)
+            tag = (await client.post("/tags/", json={"name": "bench"}, headers=headers)).json()
+            seed = [{"title": f"seed {index}", "content": "x" * 200, "tags": [tag["id"]]} for index in range(args.seed)]
+            (await client.post("/posts/batch", json=seed, headers=headers)).raise_for_status()
+
+            rng = random.Random(0)
+            plan = [rng.random() < args.write_ratio for _ in range(args.requests)]
+            latencies = {"read": [], "write": []}
+
+            async def worker(ops):
+                for write in ops:
+                    started = time.perf_counter()
+                    if write:
+                        payload = {"title": "bench", "content": "y" * 200, "tags": [tag["id"]]}
+                        response = await client.post("/posts/", json=payload, headers=headers)
+                    else:
+                        response = await client.get("/posts/", params={"skip": rng.randrange(args.seed), "limit": 10})
+                    response.raise_for_status()
+                    latencies["write" if write else "read"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(plan[index::args.workers]) for index in range(args.workers)))
+            elapsed = time.perf_counter() - started
+
+    return {
+        "requests_per_sec": round(args.requests / elapsed, 1),
+        "read": summary(latencies["read"]),
+        "write": summary(latencies["write"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=PROFILES)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1000)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.profile is None:
+        results = {}
+        for profile in PROFILES:
+            command = [sys.executable, "-m", "benchmarks.sqlite_profile", "--profile", profile]
+            command += [f"--workers={args.workers}", f"--requests={args.requests}",
+                        f"--seed={args.seed}", f"--write-ratio={args.write_ratio}"]
+            results[profile] = json.loads(subprocess.run(command, check=True, capture_output=True).stdout)
+        print(json.dumps(results, indent=2))
+        return
+
+    with scratch_database():
+        os.environ["SQLITE_PROFILE"] = args.profile
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Latency of tag -> posts listings on a tag with a million posts.
+
+Seeds posts with one ordinary tag each, then puts every post under one
+more "hot" tag, and times pages served the way the API does against the
+unbounded / grouped queries they replace:
+
+    python -m benchmarks.tag_posts --posts 1000000 --tags 20 --page-size 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import scratch_database, summary
+
+
+def page_queries(hot: int, other: int, page_size: int, deep_after: int):
+    from sqlalchemy.sql import select
+    from app.models import Post
+    from app.models.post_tag import post_tag_table
+    from app.queries import POST_COLUMNS, tagged_post_ids
+
+    def tag_page(after_id):
+        return (
+            select(*POST_COLUMNS)
+            .join(post_tag_table, post_tag_table.c.post_id == Post.id)
+            .filter(post_tag_table.c.tag_id == hot, post_tag_table.c.post_id > after_id)
+            .order_by(post_tag_table.c.post_id)
+            .limit(page_size)
+        )
+
+    def filtered(match):
+        ids = tagged_post_ids([hot, other], match, 0, page_size)
+        return select(*POST_COLUMNS).join(ids, ids.c.post_id == Post.id).order_by(Post.id).limit(page_size)
+
+    return {
+        "tag_first_page": tag_page(0),
+        "tag_deep_page": tag_page(deep_after),
+        "tags_all_page": filtered("all"),
+        "tags_any_page": filtered("any"),
+    }
+
+
+def replaced_queries(hot: int, other: int, page_size: int):
+    from sqlalchemy.sql import func, select
+    from app.models import Post
+    from app.models.post_tag import post_tag_table
+    from app.queries import POST_COLUMNS
+
+    def grouped(having):
+        ids = (
+            select(post_tag_table.c.post_id)
+            .filter(post_tag_table.c.tag_id.in_([hot, other]))
+            .group_by(post_tag_table.c.post_id)
+            .having(having)
+        )
+        return select(*POST_COLUMNS).filter(Post.id.in_(ids)).order_by(Post.id).limit(page_size)
+
+    return {
+        # What read_tag_post did without a limit: every post of the tag.
+        "tag_unbounded": (
+            select(*POST_COLUMNS)
+            .join(post_tag_table, post_tag_table.c.post_id == Post.id)
+            .filter(post_tag_table.c.tag_id == hot)
+            .order_by(post_tag_table.c.post_id)
+        ),
+        "tags_all_grouped": grouped(func.count() == 2),
+        "tags_any_grouped": grouped(func.count() >= 1),
+    }
+
+
+async def measure(queries: dict, repeat: int) -> dict:
+    from app.database.database import ReadSessionLocal
+
+    results = {}
+    for name, query in queries.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            async with ReadSessionLocal() as db:
+                rows = (await db.execute(query)).all()
+            samples.append(time.perf_counter() - started)
+        results[name] = {**summary(samples), "rows": len(rows)}
+    return results
+
+
+async def run(args):
+    from sqlalchemy.sql import insert, literal, select
+    from app.counts import reconcile_post_counts
+    from app.database.database import engine
+    from app.models import Post, Tag
+    from app.models.post_tag import post_tag_table
+    from benchmarks.seed import seed
+
+    await seed(users=100, posts=args.posts, tags=args.tags, tags_per_post=1)
+    hot = args.tags + 1
+    async with engine.begin() as conn:
+        await conn.execute(insert(Tag), [{"id": hot, "name": "hot"}])
+        await conn.execute(insert(post_tag_table).from_select(["post_id", "tag_id"], select(Post.id, literal(hot))))
+    await reconcile_post_counts()
+
+    pages = page_queries(hot, 1, args.page_size, args.posts - args.page_size * 2)
+    replaced = replaced_queries(hot, 1, args.page_size)
+    await measure({**pages, **replaced}, 1)
+    return {
+        "paginated": await measure(pages, args.repeat),
+        "replaced": await measure(replaced, max(1, args.repeat // 10)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--tags", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with scratch_database():
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
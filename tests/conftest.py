@@ -0,0 +1,63 @@
+import os
+import tempfile
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Settings are read when app.env is imported: point the app at a scratch
+# database and turn the development guards on before anything imports it,
+# so a route that lazy loads or runs over its query budget fails its test.
+SCRATCH = Path(tempfile.mkdtemp(prefix="fastapi-test-"))
+DATABASE = SCRATCH / "test.db"
+os.environ.update(
+    DATABASE_URL=f"sqlite+aiosqlite:///{DATABASE}",
+    SECRET_KEY="test-secret",
+    ALGORITHM="HS256",
+    ACCESS_TOKEN_EXPIRE_MINUTES="30",
+    ENFORCE_QUERY_BUDGETS="1",
+    STRICT_LOADING="1",
+    PURGE_INTERVAL_SECONDS="0",
+    TAG_INDEX_REFRESH_SECONDS="0",
+)
+
+from app.auth import principal_cache  # noqa: E402
+from app.database.database import engine, read_engine  # noqa: E402
+from app.main import app, lifespan  # noqa: E402
+from app.response_cache import response_cache  # noqa: E402
+
+
+USER = {"username": "alice", "email": "alice@example.com", "password": "secret"}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def reset():
+    # Every test starts from an empty database and empty process caches.
+    await engine.dispose()
+    await read_engine.dispose()
+    for path in SCRATCH.glob("test.db*"):
+        path.unlink()
+    principal_cache.clear()
+    response_cache.clear()
+
+
+@pytest.fixture
+async def client():
+    try:
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                yield client
+    finally:
+        await reset()
+
+
+@pytest.fixture
+async def auth(client):
+    await client.post("/signup", json=USER)
+    response = await client.post("/login", json={"username": USER["username"], "password": USER["password"]})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
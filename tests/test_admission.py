@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.admission import Limiter, Shed, TokenBuckets, admission, client_identity
+from app.auth import principal_cache
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_limiter_admits_by_priority_then_arrival():
+    limiter = Limiter(1, 10, 5)
+    await limiter.acquire()
+    admitted = []
+
+    async def wait(name, priority):
+        await limiter.acquire(priority)
+        admitted.append(name)
+
+    tasks = [asyncio.create_task(wait(name, priority)) for name, priority in
+             [("write", 1), ("auth", 2), ("read", 0), ("read2", 0)]]
+    await asyncio.sleep(0)
+    assert limiter.queued == 4 and limiter.in_flight == 1
+
+    for _ in tasks:
+        limiter.release()
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+    assert admitted == ["read", "read2", "write", "auth"]
+    assert limiter.in_flight == 1
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+async def test_limiter_sheds_when_the_queue_is_full():
+    limiter = Limiter(1, 1, 5)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(Shed) as shed:
+        await limiter.acquire()
+    assert shed.value.reason == "queue_full"
+    limiter.release()
+    await waiter
+
+
+async def test_limiter_sheds_requests_that_wait_too_long():
+    limiter = Limiter(1, 10, 0.01)
+    await limiter.acquire()
+    with pytest.raises(Shed) as shed:
+        await limiter.acquire()
+    assert shed.value.reason == "queue_timeout"
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_token_buckets(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.admission.time.monotonic", lambda: now[0])
+    buckets = TokenBuckets(2, 3, 100)
+    assert [buckets.take("a") for _ in range(3)] == [None, None, None]
+    assert buckets.take("a") == pytest.approx(0.5)
+    assert buckets.take("b") is None
+
+    now[0] += 0.5
+    assert buckets.take("a") is None
+    assert buckets.take("a") == pytest.approx(0.5)
+
+
+def test_clients_are_keyed_by_verified_user_else_address():
+    user = type("Principal", (), {"id": 7})()
+    principal_cache.set("good", user)
+    scope = {"client": ("10.0.0.1", 1234), "headers": []}
+    assert client_identity(scope) == "ip:10.0.0.1"
+    assert client_identity({**scope, "headers": [(b"authorization", b"Bearer good")]}) == "user:7"
+    assert client_identity({**scope, "headers": [(b"authorization", b"Bearer forged")]}) == "ip:10.0.0.1"
+    principal_cache.clear()
+
+
+async def test_overload_is_answered_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(admission, "global_limit", Limiter(0, 0, 1))
+    response = await client.get("/tags/")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert admission.shed["read", "queue_full"] >= 1
+    assert (await client.get("/metrics")).status_code == 200
+
+    monkeypatch.setattr(admission, "global_limit", Limiter(10, 10, 1))
+    monkeypatch.setattr(admission, "rate_limit", TokenBuckets(0.5, 1, 100))
+    assert (await client.get("/tags/")).status_code == 200
+    response = await client.get("/tags/")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy.sql import insert
+
+from app.cache import TTLCache
+from app.database.database import SessionLocal
+from app.models import Tag
+from app.response_cache import response_cache
+from app.tag_index import bump_tag_version, tag_index
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_cache_evicts_least_recently_used():
+    evicted = []
+    cache = TTLCache(2, 60, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert evicted == ["b"]
+    assert cache.get("a") == 1 and cache.get("b") is None
+    cache.set("a", 4)
+    assert evicted == ["b", "a"]
+    assert cache.pop("a") == 4 and evicted == ["b", "a", "a"]
+
+
+async def test_reads_are_served_from_cache_until_a_write(client, auth):
+    tag_id = (await client.post("/tags/", json={"name": "python"}, headers=auth)).json()["id"]
+    response = await client.post("/posts/", json={"title": "t", "content": "c", "tags": [tag_id]}, headers=auth)
+    post_id = response.json()["id"]
+
+    hits = response_cache.backend.hits
+    first = await client.get(f"/posts/{post_id}")
+    second = await client.get(f"/posts/{post_id}")
+    assert response_cache.backend.hits == hits + 1
+    assert first.content == second.content
+
+    response = await client.get(f"/posts/{post_id}", headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 304
+
+    await client.put(f"/tags/{tag_id}", json={"name": "py"}, headers=auth)
+    response = await client.get(f"/posts/{post_id}", headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 200
+    assert response.json()["tags"] == [{"id": tag_id, "name": "py"}]
+
+
+async def test_tag_posts_listing_follows_embedded_tags(client, auth):
+    python, rust = [
+        (await client.post("/tags/", json={"name": name}, headers=auth)).json()["id"] for name in ("python", "rust")
+    ]
+    await client.post("/posts/", json={"title": "t", "content": "c", "tags": [python, rust]}, headers=auth)
+    params = {"include": "tags"}
+    assert len((await client.get(f"/tags/{python}/posts", params=params)).json()[0]["tags"]) == 2
+
+    await client.delete(f"/tags/{rust}", headers=auth)
+    response = await client.get(f"/tags/{python}/posts", params=params)
+    assert response.json()[0]["tags"] == [{"id": python, "name": "python"}]
+
+
+async def test_tag_index_picks_up_tags_written_elsewhere(client, auth):
+    # As if another worker created the tag: nothing applied it locally.
+    async with SessionLocal() as db:
+        tag_id = (await db.execute(insert(Tag).values(name="elsewhere").returning(Tag.id))).scalar_one()
+        await bump_tag_version(db)
+        await db.commit()
+    assert tag_id not in tag_index.names
+
+    response = await client.post("/posts/", json={"title": "t", "content": "c", "tags": [tag_id]}, headers=auth)
+    assert response.status_code == 200
+    assert response.json()["tags"] == [{"id": tag_id, "name": "elsewhere"}]
+    assert tag_index.names[tag_id] == "elsewhere"
+
+
+async def test_unknown_tags_do_not_reload_the_tag_index(client, auth):
+    await client.post("/tags/", json={"name": "python"}, headers=auth)
+    loads = tag_index.loads
+    for _ in range(5):
+        assert (await client.get("/posts/", params={"tags": "999"})).status_code == 400
+    assert tag_index.loads == loads
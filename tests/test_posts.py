@@ -0,0 +1,179 @@
+import json
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def tags(client, auth):
+    ids = {}
+    for name in ("python", "rust"):
+        ids[name] = (await client.post("/tags/", json={"name": name}, headers=auth)).json()["id"]
+    return ids
+
+
+async def create_post(client, auth, title, tags=(), content="hello world"):
+    response = await client.post("/posts/", json={"title": title, "content": content, "tags": list(tags)}, headers=auth)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_create_and_read_post(client, auth, tags):
+    post = await create_post(client, auth, "first", [tags["python"]])
+    assert post == {
+        "id": post["id"], "title": "first", "content": "hello world",
+        "tags": [{"id": tags["python"], "name": "python"}]
+    }
+
+    response = await client.get(f"/posts/{post['id']}")
+    assert response.status_code == 200
+    assert response.json() == {
+        "title": "first", "content": "hello world", "tags": [{"id": tags["python"], "name": "python"}]
+    }
+    assert (await client.get("/posts/999")).status_code == 404
+
+
+async def test_create_post_with_unknown_tag(client, auth):
+    response = await client.post("/posts/", json={"title": "t", "content": "c", "tags": [42]}, headers=auth)
+    assert response.status_code == 400
+
+
+async def test_read_post_fields(client, auth, tags):
+    post = await create_post(client, auth, "first", [tags["python"]])
+    response = await client.get(f"/posts/{post['id']}", params={"fields": "id,title", "include": "author"})
+    assert response.json() == {"id": post["id"], "title": "first", "author": {"id": 1, "username": "alice"}}
+    assert (await client.get(f"/posts/{post['id']}", params={"fields": "nope"})).status_code == 400
+
+
+async def test_read_posts_pages(client, auth):
+    for i in range(5):
+        await create_post(client, auth, f"t{i}")
+
+    response = await client.get("/posts/", params={"limit": 2})
+    assert [post["title"] for post in response.json()] == ["t0", "t1"]
+    response = await client.get("/posts/", params={"limit": 2, "cursor": response.headers["x-next-cursor"]})
+    assert [post["title"] for post in response.json()] == ["t2", "t3"]
+    response = await client.get("/posts/", params={"limit": 2, "skip": 4})
+    assert [post["title"] for post in response.json()] == ["t4"]
+
+
+async def test_read_posts_by_tags(client, auth, tags):
+    python, rust = tags["python"], tags["rust"]
+    await create_post(client, auth, "both", [python, rust])
+    await create_post(client, auth, "python", [python])
+    await create_post(client, auth, "rust", [rust])
+    await create_post(client, auth, "none")
+
+    response = await client.get("/posts/", params={"tags": f"{python},{rust}"})
+    assert [post["title"] for post in response.json()] == ["both"]
+    response = await client.get("/posts/", params={"tags": f"{python},{rust}", "match": "any"})
+    assert [post["title"] for post in response.json()] == ["both", "python", "rust"]
+    assert (await client.get("/posts/", params={"tags": "x"})).status_code == 400
+    assert (await client.get("/posts/", params={"tags": "42"})).status_code == 400
+
+
+async def test_batch(client, auth, tags):
+    response = await client.post("/posts/batch", json=[
+        {"title": "a", "content": "c", "tags": [tags["python"]]},
+        {"title": "b", "content": "c", "tags": [42]},
+        {"title": "c", "content": "c", "tags": [tags["rust"], tags["python"]]},
+    ], headers=auth)
+    assert response.status_code == 200
+    body = response.json()
+    assert [(post["title"], [tag["name"] for tag in post["tags"]]) for post in body["created"]] == [
+        ("a", ["python"]), ("c", ["rust", "python"])
+    ]
+    assert body["errors"] == [{"index": 1, "detail": "Unknown tag ids: [42]"}]
+    for post in body["created"]:
+        assert (await client.get(f"/posts/{post['id']}")).json()["title"] == post["title"]
+
+
+async def test_update_post(client, auth, tags):
+    post = await create_post(client, auth, "first", [tags["python"]])
+    response = await client.put(
+        f"/posts/{post['id']}", json={"title": "renamed", "content": None, "tags": None}, headers=auth)
+    assert response.status_code == 200
+    assert response.json()["title"] == "renamed"
+    assert response.json()["tags"] == [{"id": tags["python"], "name": "python"}]
+
+    response = await client.put(
+        f"/posts/{post['id']}", json={"title": None, "content": None, "tags": [tags["rust"]]}, headers=auth)
+    assert response.json()["tags"] == [{"id": tags["rust"], "name": "rust"}]
+    assert (await client.get(f"/posts/{post['id']}")).json() == {
+        "title": "renamed", "content": "hello world", "tags": [{"id": tags["rust"], "name": "rust"}]
+    }
+    response = await client.put("/posts/999", json={"title": "x", "content": None, "tags": None}, headers=auth)
+    assert response.status_code == 404
+
+
+async def test_delete_post(client, auth):
+    post = await create_post(client, auth, "first")
+    assert (await client.delete(f"/posts/{post['id']}", headers=auth)).status_code == 204
+    assert (await client.get(f"/posts/{post['id']}")).status_code == 404
+    assert (await client.get("/posts/")).json() == []
+    assert (await client.delete(f"/posts/{post['id']}", headers=auth)).status_code == 404
+
+
+async def test_only_the_author_can_change_a_post(client, auth):
+    post = await create_post(client, auth, "first")
+    await client.post("/signup", json={"username": "bob", "email": "bob@example.com", "password": "pw"})
+    token = (await client.post("/login", json={"username": "bob", "password": "pw"})).json()["access_token"]
+    bob = {"Authorization": f"Bearer {token}"}
+    response = await client.put(f"/posts/{post['id']}", json={"title": "x", "content": None, "tags": None}, headers=bob)
+    assert response.status_code == 404
+    assert (await client.delete(f"/posts/{post['id']}", headers=bob)).status_code == 404
+
+
+async def test_search(client, auth, tags):
+    await create_post(client, auth, "cats", [tags["python"]], content="all about cats")
+    await create_post(client, auth, "dogs", content="all about dogs")
+
+    response = await client.get("/posts/search", params={"q": "cats"})
+    assert [hit["title"] for hit in response.json()] == ["cats"]
+    response = await client.get("/posts/search", params={"q": "about", "tag": tags["python"]})
+    assert [hit["title"] for hit in response.json()] == ["cats"]
+    assert (await client.get("/posts/search", params={"q": "!!"})).json() == []
+
+
+async def test_export(client, auth, tags):
+    await create_post(client, auth, "first", [tags["python"], tags["rust"]])
+    await create_post(client, auth, "second")
+
+    response = await client.get("/posts/export")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["title"], [tag["name"] for tag in row["tags"]]) for row in rows] == [
+        ("first", ["python", "rust"]), ("second", [])
+    ]
+    response = await client.get("/posts/export", params={"tag": tags["rust"]})
+    assert [json.loads(line)["title"] for line in response.text.splitlines()] == ["first"]
+
+
+async def test_metrics(client, auth):
+    await create_post(client, auth, "first")
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'app_request_queries_count{method="POST",route="/posts/"}' in response.text
+
+
+async def test_export_reads_in_chunks(client, auth, tags, monkeypatch):
+    monkeypatch.setattr("app.routers.posts.EXPORT_YIELD_PER", 2)
+    for i in range(5):
+        await create_post(client, auth, f"t{i}", [tags["python"]] if i % 2 else [])
+    response = await client.get("/posts/export")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["t0", "t1", "t2", "t3", "t4"]
+    assert [len(row["tags"]) for row in rows] == [0, 1, 0, 1, 0]
+    response = await client.get("/posts/export", params={"tag": tags["python"]})
+    assert [json.loads(line)["title"] for line in response.text.splitlines()] == ["t1", "t3"]
+
+
+async def test_deleted_tags_are_unknown_to_every_filter(client, auth, tags):
+    await create_post(client, auth, "cats", [tags["python"]], content="all about cats")
+    await client.delete(f"/tags/{tags['python']}", headers=auth)
+    tag = tags["python"]
+    assert (await client.get("/posts/", params={"tags": tag})).status_code == 400
+    assert (await client.get("/posts/export", params={"tag": tag})).status_code == 400
+    assert (await client.get("/posts/search", params={"q": "cats", "tag": tag})).status_code == 400
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import read_router, replica_engine
+from app.database.routing import ReadRouter, Replica
+from app.response_cache import response_cache
+from conftest import DATABASE, SCRATCH
+
+
+pytestmark = pytest.mark.anyio
+
+
+def replica(name: str, url: str) -> Replica:
+    engine = replica_engine(url)
+    return Replica(name, engine, sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False))
+
+
+@pytest.fixture
+async def replicas(client, monkeypatch):
+    # A read-only connection to the test database stands in for a replica
+    # that has caught up; one to a missing file for a replica that is down.
+    replicas = [
+        replica("replica1", f"sqlite+aiosqlite:///file:{DATABASE}?mode=ro&uri=true"),
+        replica("replica2", f"sqlite+aiosqlite:///file:{SCRATCH / 'missing' / 'x.db'}?mode=ro&uri=true"),
+    ]
+    replicas[1].healthy = False
+    monkeypatch.setattr(read_router, "replicas", replicas)
+    read_router._writers.clear()
+    read_router.routed.clear()
+    yield replicas
+    for item in replicas:
+        await item.engine.dispose()
+
+
+async def test_clients_read_their_own_writes_from_the_primary(client, auth, replicas):
+    await client.post("/tags/", json={"name": "python"}, headers=auth)
+    read_router.routed.clear()
+
+    response = await client.get("/tags/", headers=auth)
+    assert [tag["name"] for tag in response.json()] == ["python"]
+    assert read_router.routed == {"sticky": 1}
+
+    await client.get("/tags/", params={"limit": 5})
+    assert read_router.routed == {"sticky": 1, "replica1": 1}
+
+
+async def test_unhealthy_replicas_fall_back_to_the_primary(client, replicas):
+    replicas[1].healthy = True
+    await read_router.check()
+    assert [item.healthy for item in replicas] == [True, False]
+
+    replicas[0].healthy = False
+    await client.get("/tags/")
+    assert read_router.routed == {"primary": 1}
+
+    await read_router.check()
+    await client.get("/tags/", params={"limit": 5})
+    assert read_router.routed == {"primary": 1, "replica1": 1}
+
+
+async def test_responses_read_from_a_replica_during_the_lag_window_are_not_cached(
+    client, auth, replicas, monkeypatch
+):
+    tag_id = (await client.post("/tags/", json={"name": "python"}, headers=auth)).json()["id"]
+    read_router.routed.clear()
+
+    for _ in range(2):
+        assert (await client.get(f"/tags/{tag_id}")).json()["name"] == "python"
+    assert read_router.routed == {"replica1": 2}
+    assert len(response_cache.backend) == 0
+
+    monkeypatch.setattr("app.response_cache.REPLICA_MAX_LAG_SECONDS", 0)
+    for _ in range(2):
+        await client.get(f"/tags/{tag_id}")
+    assert read_router.routed == {"replica1": 3}
+    assert len(response_cache.backend) == 1
+
+
+def test_least_busy_picks_the_replica_with_fewest_sessions():
+    replicas = [Replica(name, None, None) for name in ("a", "b", "c")]
+    router = ReadRouter(None, replicas, "least_busy", 2, 1)
+    replicas[0].in_flight, replicas[1].in_flight, replicas[2].in_flight = 2, 0, 1
+    assert router.pick().name == "b"
+    replicas[1].healthy = False
+    assert router.pick().name == "c"
+    for item in replicas:
+        item.healthy = False
+    assert router.pick() is None
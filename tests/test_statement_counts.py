@@ -0,0 +1,83 @@
+import re
+
+import pytest
+
+from app.auth import principal_cache
+
+
+pytestmark = pytest.mark.anyio
+
+
+# Exact SQL statements per write, with the principal cache cold so the
+# current user is looked up as well: the most a route can issue, which is
+# what its query budget has to allow for.
+async def statements(request) -> int:
+    principal_cache.clear()
+    response = await request
+    assert response.status_code < 400, response.text
+    return int(re.search(r'desc="(\d+) queries"', response.headers["server-timing"]).group(1))
+
+
+@pytest.fixture
+async def tags(client, auth):
+    return [(await client.post("/tags/", json={"name": name}, headers=auth)).json()["id"] for name in "abc"]
+
+
+async def create_post(client, auth, tags):
+    response = await client.post("/posts/", json={"title": "t", "content": "c", "tags": tags}, headers=auth)
+    return response.json()["id"]
+
+
+async def test_signup(client):
+    user = {"username": "bob", "email": "bob@example.com", "password": "pw"}
+    assert await statements(client.post("/signup", json=user)) == 2
+
+
+async def test_create_tag(client, auth):
+    # User, INSERT ... RETURNING, tag_version bump.
+    assert await statements(client.post("/tags/", json={"name": "a"}, headers=auth)) == 3
+
+
+async def test_update_tag(client, auth, tags):
+    assert await statements(client.put(f"/tags/{tags[0]}", json={"name": "z"}, headers=auth)) == 3
+
+
+async def test_delete_tag(client, auth, tags):
+    assert await statements(client.delete(f"/tags/{tags[0]}", headers=auth)) == 3
+
+
+async def test_create_post(client, auth, tags):
+    # User, INSERT ... RETURNING, post_tag rows, user and tag counts.
+    post = {"title": "t", "content": "c", "tags": tags[:2]}
+    assert await statements(client.post("/posts/", json=post, headers=auth)) == 5
+    post = {"title": "t", "content": "c", "tags": []}
+    assert await statements(client.post("/posts/", json=post, headers=auth)) == 3
+
+
+async def test_create_posts_batch(client, auth, tags):
+    posts = [{"title": f"t{i}", "content": "c", "tags": tags[:2]} for i in range(5)]
+    assert await statements(client.post("/posts/batch", json=posts, headers=auth)) == 5
+
+
+async def test_update_post_without_tag_changes(client, auth, tags):
+    # User, UPDATE ... RETURNING, current tags.
+    post_id = await create_post(client, auth, tags[:2])
+    change = {"title": "x", "content": None, "tags": None}
+    assert await statements(client.put(f"/posts/{post_id}", json=change, headers=auth)) == 3
+    change = {"title": "y", "content": None, "tags": tags[:2]}
+    assert await statements(client.put(f"/posts/{post_id}", json=change, headers=auth)) == 3
+
+
+async def test_update_post_with_tag_changes(client, auth, tags):
+    # Plus removed links, added links and the tag counts.
+    post_id = await create_post(client, auth, tags[:2])
+    change = {"title": "x", "content": None, "tags": tags[1:]}
+    assert await statements(client.put(f"/posts/{post_id}", json=change, headers=auth)) == 6
+    change = {"title": None, "content": None, "tags": tags}
+    assert await statements(client.put(f"/posts/{post_id}", json=change, headers=auth)) == 5
+
+
+async def test_delete_post(client, auth, tags):
+    # User, UPDATE, user count, tag counts.
+    post_id = await create_post(client, auth, tags[:2])
+    assert await statements(client.delete(f"/posts/{post_id}", headers=auth)) == 4
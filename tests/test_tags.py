@@ -0,0 +1,100 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_tags(client, auth, *names):
+    ids = []
+    for name in names:
+        response = await client.post("/tags/", json={"name": name}, headers=auth)
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def test_create_and_read_tag(client, auth):
+    response = await client.post("/tags/", json={"name": "python"}, headers=auth)
+    assert response.status_code == 200
+    tag = response.json()
+    assert tag == {"id": tag["id"], "name": "python", "post_count": 0}
+
+    response = await client.get(f"/tags/{tag['id']}")
+    assert response.status_code == 200
+    assert response.json() == {"name": "python", "post_count": 0}
+    assert (await client.get("/tags/999")).status_code == 404
+
+
+async def test_tag_names_are_unique_among_live_tags(client, auth):
+    tag_id, other_id = await create_tags(client, auth, "python", "rust")
+    assert (await client.post("/tags/", json={"name": "python"}, headers=auth)).status_code == 409
+    assert (await client.put(f"/tags/{other_id}", json={"name": "python"}, headers=auth)).status_code == 409
+
+    assert (await client.delete(f"/tags/{tag_id}", headers=auth)).status_code == 204
+    response = await client.post("/tags/", json={"name": "python"}, headers=auth)
+    assert response.status_code == 200
+    assert response.json()["id"] != tag_id
+
+
+async def test_read_tags_pages_with_cursor(client, auth):
+    await create_tags(client, auth, "a", "b", "c")
+    response = await client.get("/tags/", params={"limit": 2})
+    assert [tag["name"] for tag in response.json()] == ["a", "b"]
+
+    response = await client.get("/tags/", params={"limit": 2, "cursor": response.headers["x-next-cursor"]})
+    assert [tag["name"] for tag in response.json()] == ["c"]
+    assert "x-next-cursor" not in response.headers
+    assert (await client.get("/tags/", params={"cursor": "zzz"})).status_code == 400
+
+
+async def test_read_tags_sorted_by_post_count(client, auth):
+    a, b = await create_tags(client, auth, "a", "b")
+    await client.post("/posts/", json={"title": "t", "content": "c", "tags": [b]}, headers=auth)
+    response = await client.get("/tags/", params={"sort": "-post_count", "fields": "id,post_count"})
+    assert response.json() == [{"id": b, "post_count": 1}, {"id": a, "post_count": 0}]
+
+
+async def test_update_tag(client, auth):
+    (tag_id,) = await create_tags(client, auth, "python")
+    response = await client.put(f"/tags/{tag_id}", json={"name": "py"}, headers=auth)
+    assert response.status_code == 200
+    assert response.json() == {"id": tag_id, "name": "py", "post_count": 0}
+    assert (await client.get(f"/tags/{tag_id}")).json()["name"] == "py"
+    assert (await client.put("/tags/999", json={"name": "x"}, headers=auth)).status_code == 404
+
+
+async def test_delete_tag(client, auth):
+    (tag_id,) = await create_tags(client, auth, "python")
+    assert (await client.delete(f"/tags/{tag_id}", headers=auth)).status_code == 204
+    assert (await client.get(f"/tags/{tag_id}")).status_code == 404
+    assert (await client.get(f"/tags/{tag_id}/posts")).status_code == 404
+    assert (await client.delete(f"/tags/{tag_id}", headers=auth)).status_code == 404
+
+
+async def test_read_tag_posts(client, auth):
+    tag_id, other_id = await create_tags(client, auth, "python", "rust")
+    for i in range(3):
+        await client.post("/posts/", json={"title": f"t{i}", "content": "c", "tags": [tag_id]}, headers=auth)
+    await client.post("/posts/", json={"title": "other", "content": "c", "tags": [other_id]}, headers=auth)
+
+    response = await client.get(f"/tags/{tag_id}/posts", params={"limit": 2})
+    assert [post["title"] for post in response.json()] == ["t0", "t1"]
+    assert set(response.json()[0]) == {"id", "title", "content"}
+    response = await client.get(f"/tags/{tag_id}/posts", params={"cursor": response.headers["x-next-cursor"]})
+    assert [post["title"] for post in response.json()] == ["t2"]
+
+    response = await client.get(f"/tags/{tag_id}/posts", params={"fields": "title", "include": "tags,author"})
+    assert response.json()[0] == {
+        "title": "t0",
+        "tags": [{"id": tag_id, "name": "python"}],
+        "author": {"id": 1, "username": "alice"},
+    }
+
+
+@pytest.mark.parametrize("limit", [-1, 0, 101])
+async def test_listings_bound_their_limit(client, auth, limit):
+    (tag_id,) = await create_tags(client, auth, "python")
+    for path, params in [("/tags/", {}), (f"/tags/{tag_id}/posts", {}), ("/posts/", {}), ("/posts/search", {"q": "x"})]:
+        response = await client.get(path, params={**params, "limit": limit})
+        assert response.status_code == 422, path
+        assert response.json()["detail"][0]["loc"] == ["query", "limit"]
@@ -0,0 +1,33 @@
+import pytest
+
+from conftest import USER
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_signup(client):
+    response = await client.post("/signup", json=USER)
+    assert response.status_code == 200
+    assert response.json() == {"username": "alice", "email": "alice@example.com", "post_count": 0}
+
+
+async def test_signup_taken_username(client, auth):
+    response = await client.post("/signup", json={**USER, "email": "other@example.com"})
+    assert response.status_code == 400
+
+
+async def test_login(client, auth):
+    response = await client.post("/login", json={"username": "alice", "password": "secret"})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+
+async def test_login_wrong_password(client, auth):
+    response = await client.post("/login", json={"username": "alice", "password": "wrong"})
+    assert response.status_code == 401
+
+
+async def test_writes_need_a_valid_token(client):
+    response = await client.post("/tags/", json={"name": "a"}, headers={"Authorization": "Bearer nope"})
+    assert response.status_code == 401
@@ -0,0 +1,92 @@
+import asyncio
+
+import sqlite3
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.sql import insert
+
+from app.counts import reconcile_post_counts
+from app.database.coalescer import write_coalescer
+from app.database.database import SessionLocal, emit_begin, engine
+from app.models import Tag
+from app.queries import USER_BY_USERNAME
+from conftest import DATABASE
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def post_counts(client, *tag_ids):
+    return [(await client.get(f"/tags/{tag_id}")).json()["post_count"] for tag_id in tag_ids]
+
+
+async def test_post_counts_follow_writes(client, auth):
+    python, rust = [
+        (await client.post("/tags/", json={"name": name}, headers=auth)).json()["id"] for name in ("python", "rust")
+    ]
+    post_id = (await client.post(
+        "/posts/", json={"title": "t", "content": "c", "tags": [python, rust]}, headers=auth)).json()["id"]
+    await client.post("/posts/batch", json=[{"title": "b", "content": "c", "tags": [python]}] * 2, headers=auth)
+    assert await post_counts(client, python, rust) == [3, 1]
+
+    await client.put(f"/posts/{post_id}", json={"title": None, "content": None, "tags": [rust]}, headers=auth)
+    assert await post_counts(client, python, rust) == [2, 1]
+
+    await client.delete(f"/posts/{post_id}", headers=auth)
+    assert await post_counts(client, python, rust) == [2, 0]
+    response = await client.get("/tags/", params={"sort": "-post_count", "fields": "name"})
+    assert response.json() == [{"name": "python"}, {"name": "rust"}]
+    assert await reconcile_post_counts() == {"tags": 0, "users": 0}
+
+
+@pytest.fixture
+async def coalescing(client):
+    # What WRITE_COALESCING=true sets up at import and startup.
+    await engine.dispose()
+    listeners = emit_begin(engine, "BEGIN IMMEDIATE")
+    write_coalescer.start()
+    yield
+    await write_coalescer.stop()
+    for name, listener in listeners:
+        event.remove(engine.sync_engine, name, listener)
+    await engine.dispose()
+
+
+async def test_group_commit(client, auth, coalescing):
+    tag_id = (await client.post("/tags/", json={"name": "python"}, headers=auth)).json()["id"]
+    batches, units = write_coalescer.batches, write_coalescer.units
+
+    responses = await asyncio.gather(*(
+        client.post("/posts/", json={"title": f"t{i}", "content": "c", "tags": [tag_id]}, headers=auth)
+        for i in range(10)
+    ))
+    assert [response.status_code for response in responses] == [200] * 10
+    assert write_coalescer.units == units + 10
+    assert write_coalescer.batches < batches + 10
+    assert len({response.json()["id"] for response in responses}) == 10
+    assert await post_counts(client, tag_id) == [10]
+
+
+async def test_group_commit_isolates_failures(client, auth, coalescing):
+    await client.post("/tags/", json={"name": "python"}, headers=auth)
+    responses = await asyncio.gather(
+        client.post("/tags/", json={"name": "python"}, headers=auth),
+        client.post("/tags/", json={"name": "rust"}, headers=auth),
+    )
+    assert [response.status_code for response in responses] == [409, 200]
+    assert [tag["name"] for tag in (await client.get("/tags/")).json()] == ["python", "rust"]
+
+
+async def test_write_waits_for_a_commit_from_another_process(client, auth):
+    # A handler reads, then writes; another process commits in between. The
+    # write must take its lock then (waiting out busy_timeout if need be),
+    # not fail because its transaction started before that commit.
+    async with SessionLocal() as db:
+        await db.execute(USER_BY_USERNAME, {"username": "alice"})
+        other = sqlite3.connect(DATABASE)
+        other.execute("UPDATE tag_version SET version = version + 1")
+        other.commit()
+        other.close()
+        await db.execute(insert(Tag).values(name="python"))
+        await db.commit()